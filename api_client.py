@@ -0,0 +1,237 @@
+"""Client HTTP partagé vers le backend.
+
+Une seule `requests.Session` par process (connexions keep-alive réutilisées,
+pas de nouveau handshake TCP+TLS à chaque appel) et un pool de threads borné
+pour lancer plusieurs requêtes indépendantes en parallèle. Les réponses sont
+demandées compressées (gzip, deflate, plus brotli et zstd si leurs décodeurs
+sont installés).
+
+Le backend tourne sur Render et subit des démarrages à froid : chaque appel a
+un timeout propre à son endpoint, les erreurs transitoires (connexion,
+timeout, 429/5xx) sont réessayées avec un backoff exponentiel à jitter, dans
+la limite de `API_RETRY_BUDGET_SECONDS` par appel, et un
+disjoncteur par hôte et endpoint (préfixes de `TIMEOUTS`) coupe court aux
+appels pendant `API_BREAKER_COOLDOWN` secondes après `API_BREAKER_THRESHOLD`
+échecs consécutifs : un référentiel en panne ne coupe pas /search. Un ping de
+maintien à chaud optionnel (`KEEP_WARM_SECONDS`) évite la mise en veille.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+API_MAX_WORKERS = int(os.getenv("API_MAX_WORKERS", 8))
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", 32))
+API_RETRIES = int(os.getenv("API_RETRIES", 2))
+API_BACKOFF_SECONDS = float(os.getenv("API_BACKOFF_SECONDS", 0.5))
+# durée totale max d'un appel, réessais et attentes compris
+API_RETRY_BUDGET_SECONDS = float(os.getenv("API_RETRY_BUDGET_SECONDS", 30))
+API_BREAKER_THRESHOLD = int(os.getenv("API_BREAKER_THRESHOLD", 3))
+API_BREAKER_COOLDOWN = float(os.getenv("API_BREAKER_COOLDOWN", 30))
+KEEP_WARM_SECONDS = float(os.getenv("KEEP_WARM_SECONDS", 0))
+
+# (connexion, lecture) en secondes, par préfixe de chemin ; le plus long l'emporte.
+# Chaque préfixe a aussi son propre disjoncteur.
+TIMEOUTS = {
+    "/search": (5, 20),
+    "/candidat/": (5, 10),
+    "/skills/": (5, 10),
+}
+DEFAULT_TIMEOUT = (5, 20)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+KEEP_WARM_PATH = "/candidat/contrat"
+
+
+class ApiError(Exception):
+    """Réponse HTTP inattendue du backend."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class CircuitOpenError(Exception):
+    """Appel refusé sans contacter le backend : disjoncteur ouvert."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Backend {host} indisponible, nouvel essai dans {retry_in:.0f} s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Ouvert après `threshold` échecs consécutifs, un essai laissé passer après `cooldown`."""
+
+    def __init__(self, host: str, threshold: int = API_BREAKER_THRESHOLD, cooldown: float = API_BREAKER_COOLDOWN):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining > 0 or self._trial:
+                raise CircuitOpenError(self.host, max(remaining, 0))
+            self._trial = True  # semi-ouvert : un seul appel d'essai
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+_session = None
+_session_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=API_MAX_WORKERS, thread_name_prefix="api")
+_breakers = {}
+_keep_warm_started = set()
+
+
+def get_session() -> requests.Session:
+    """Session HTTP du process, créée au premier appel."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(make_headers(accept_encoding=True))
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=API_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _endpoint(url: str):
+    """(hôte, préfixe de `TIMEOUTS` le plus long, ou "")."""
+    parts = urlsplit(url)
+    matches = [prefix for prefix in TIMEOUTS if parts.path.startswith(prefix)]
+    return parts.netloc, max(matches, key=len) if matches else ""
+
+
+def breaker_for(url: str) -> CircuitBreaker:
+    key = _endpoint(url)
+    with _session_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker("".join(key))
+        return _breakers[key]
+
+
+def timeout_for(url: str):
+    prefix = _endpoint(url)[1]
+    return TIMEOUTS[prefix] if prefix else DEFAULT_TIMEOUT
+
+
+def get(url: str, params=None, timeout=None, retries: int = API_RETRIES) -> requests.Response:
+    """GET avec timeout par endpoint, réessais à backoff et disjoncteur.
+
+    `timeout` : (connexion, lecture) ou une seule durée pour les deux. Le
+    budget d'un appel vaut au moins ce timeout, même s'il dépasse
+    `API_RETRY_BUDGET_SECONDS`.
+
+    Lève `CircuitOpenError` sans appel réseau si le disjoncteur est ouvert.
+    Une fois les réessais ou le budget épuisés, relève la
+    dernière erreur réseau ou retourne la dernière réponse (statut 429/5xx).
+    Toute autre exception compte comme un échec pour le disjoncteur.
+    """
+    breaker = breaker_for(url)
+    breaker.before_call()
+    timeout = timeout or timeout_for(url)
+    connect, read = (timeout, timeout) if isinstance(timeout, (int, float)) else timeout
+    deadline = time.monotonic() + max(API_RETRY_BUDGET_SECONDS, connect + read)
+    succeeded = False
+    try:
+        for attempt in range(retries + 1):
+            error = None
+            remaining = deadline - time.monotonic()
+            try:
+                response = get_session().get(url, params=params, timeout=(connect, max(min(read, remaining), 1)))
+            except RETRY_ERRORS as e:
+                error = e
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    succeeded = True
+                    return response
+            if attempt == retries:
+                break
+            pause = random.uniform(0, API_BACKOFF_SECONDS * 2 ** attempt)
+            if time.monotonic() + pause + connect >= deadline:
+                break
+            time.sleep(pause)
+        if error is not None:
+            raise error
+        return response
+    finally:
+        # l'essai du disjoncteur semi-ouvert est toujours soldé, quelle que soit l'issue
+        if succeeded:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+
+
+def get_json(url: str, params=None, timeout=None):
+    response = get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def submit(fn, *args, **kwargs):
+    """Exécute `fn` sur le pool partagé et retourne le Future."""
+    return _executor.submit(fn, *args, **kwargs)
+
+
+def fetch_all(urls: dict, timeout=None):
+    """Récupère en parallèle {nom: url}.
+
+    Retourne (résultats, erreurs) : deux dicts indexés par nom, un échec
+    n'empêche pas les autres requêtes d'aboutir.
+    """
+    futures = {name: submit(get_json, url, timeout=timeout) for name, url in urls.items()}
+    results, errors = {}, {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            errors[name] = e
+    return results, errors
+
+
+def start_keep_warm(api_base_url: str, interval: float = KEEP_WARM_SECONDS):
+    """Ping périodique d'un endpoint léger pour garder le backend éveillé (0 = désactivé)."""
+    if interval <= 0:
+        return
+    with _session_lock:
+        if api_base_url in _keep_warm_started:
+            return
+        _keep_warm_started.add(api_base_url)
+
+    def run():
+        while True:
+            try:
+                get(f"{api_base_url}{KEEP_WARM_PATH}", retries=0)
+            except Exception:
+                pass
+            time.sleep(interval)
+
+    threading.Thread(target=run, name="api-keep-warm", daemon=True).start()
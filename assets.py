@@ -0,0 +1,65 @@
+"""Images statiques (ML/, logos/) décodées une fois et servies redimensionnées.
+
+Chaque fichier est décodé une seule fois par process (clé : chemin + mtime),
+puis réduit à la largeur d'affichage et réencodé en WebP (PNG si Pillow n'a
+pas le support WebP). Ce sont ces octets, bien plus légers que l'original,
+qui partent vers le navigateur.
+"""
+import io
+import os
+import threading
+
+from PIL import Image, features
+
+import tracing
+
+ASSET_MAX_WIDTH = int(os.getenv("ASSET_MAX_WIDTH", 1200))
+ASSET_FORMAT = "WEBP" if features.check("webp") else "PNG"
+
+_decoded = {}    # (chemin, mtime) -> Image
+_variants = {}   # (chemin, mtime, largeur, format) -> bytes
+_lock = threading.Lock()
+
+
+def _decode(path: str, mtime: float) -> Image.Image:
+    key = (path, mtime)
+    with _lock:
+        img = _decoded.get(key)
+    if img is None:
+        with Image.open(path) as f:
+            img = f.copy()
+        with _lock:
+            for stale in [k for k in _decoded if k[0] == path]:
+                del _decoded[stale]
+            _decoded[key] = img
+    return img
+
+
+def image_variant(path: str, width: int = ASSET_MAX_WIDTH, fmt: str = ASSET_FORMAT) -> bytes:
+    """Octets de `path` réduit à `width` pixels de large au plus, encodé en `fmt`."""
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    key = (path, mtime, width, fmt)
+    with _lock:
+        data = _variants.get(key)
+    if data is not None:
+        tracing.incr("cache_hits_total", cache="image")
+        return data
+    tracing.incr("cache_misses_total", cache="image")
+
+    with tracing.span("image_load"):
+        img = _decode(path, mtime)
+        if img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        buf = io.BytesIO()
+        if fmt == "WEBP":
+            img.save(buf, format="WEBP", quality=85, method=4)
+        else:
+            img.save(buf, format=fmt, optimize=True)
+        data = buf.getvalue()
+
+    with _lock:
+        for stale in [k for k in _variants if k[0] == path and k[1] != mtime]:
+            del _variants[stale]
+        _variants[key] = data
+    return data
@@ -0,0 +1,182 @@
+"""Banc de mesure des reruns de main.py et main_2.py via streamlit.testing.
+
+Chaque application est pilotée par AppTest contre le backend de substitution
+(bench.mock_backend) à travers un scénario type : premier affichage, recherche
+filtrée sur une région (plusieurs pages, vérifié), pages suivantes, retour
+arrière, rerun à l'identique. Pour chaque rerun : temps mur, nombre d'appels
+HTTP reçus par le backend et pic mémoire Python (tracemalloc).
+
+    python -m bench.apptest_bench --offers 20000 --latency-ms 300
+    python -m bench.apptest_bench --json bench_output.json --max-rerun-ms 2000 --max-calls 8
+
+Code de sortie 1 si un seuil --max-* est dépassé ou si un rerun lève une exception.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.mock_backend import MockBackend, SyntheticData  # noqa: E402
+
+# libellés propres à chaque application
+APPS = {
+    "main.py": {"page": "👤 Espace Candidat", "next": "➡️ Page suivante", "prev": "⬅️ Page précédente"},
+    "main_2.py": {"page": None, "next": "Suivant ➡️", "prev": "⬅️ Précédent"},
+}
+SUBMIT_LABEL = "🔍 Rechercher"
+
+
+def _button(at, label):
+    for button in at.button:
+        if button.label == label:
+            return button
+    raise LookupError(f"bouton introuvable : {label!r}")
+
+
+def _reset_caches():
+    """Repart de caches vides pour que chaque application soit mesurée à froid."""
+    import geo_index
+    import map_view
+    import nearby
+    import pagination
+    import search_cache
+    import skill_search
+    import skill_stats
+    import vocab_cache
+    vocab_cache.invalidate_vocabularies()
+    search_cache.SEARCH_CACHE.clear()
+    with pagination._lock:
+        pagination._states.clear()
+    with skill_stats._stats_lock:
+        skill_stats._stats.clear()
+    for module in (geo_index, skill_search, nearby):
+        module._current.reset()
+    map_view.MAP_CACHE.invalidate()
+    with map_view._figures_lock:
+        map_view._figures.clear()
+
+
+def scenario(at, labels):
+    """Étapes (nom, action) ; chaque action déclenche exactement un rerun."""
+    steps = [("premier affichage", lambda: at.run())]
+    if labels["page"]:
+        steps.append(("page profil", lambda: at.sidebar.radio[0].set_value(labels["page"]).run()))
+
+    def search():
+        # une région : assez d'offres pour plusieurs pages, moins que sans filtre
+        regions = at.multiselect[2]
+        regions.set_value([regions.options[0]])
+        _button(at, SUBMIT_LABEL).click().run()
+        if _button(at, labels["next"]).disabled:
+            raise AssertionError("la recherche filtrée tient sur une seule page")
+
+    def turn(label, page):
+        def action():
+            _button(at, labels[label]).click().run()
+            if at.session_state["page"] != page:
+                raise AssertionError(f"page {at.session_state['page']} affichée au lieu de {page}")
+        return action
+
+    steps += [
+        ("recherche filtrée", search),
+        ("page suivante", turn("next", 1)),
+        ("page suivante (2)", turn("next", 2)),
+        ("page précédente", turn("prev", 1)),
+        ("rerun à l'identique", lambda: at.run()),
+    ]
+    return steps
+
+
+def run_app(script, backend, settle_ms=200, measure_memory=True, timeout=60):
+    from streamlit.testing.v1 import AppTest
+
+    _reset_caches()
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=timeout)
+    results = []
+    for name, action in scenario(at, APPS[script]):
+        backend.reset()
+        if measure_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        error = None
+        try:
+            action()
+        except Exception as e:
+            error = repr(e)
+        wall_ms = (time.perf_counter() - start) * 1000
+        peak = None
+        if measure_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        time.sleep(settle_ms / 1000)  # laisse arriver les préchargements lancés par ce rerun
+        if error is None and at.exception:
+            error = at.exception[0].message
+        results.append({
+            "app": script,
+            "step": name,
+            "wall_ms": round(wall_ms, 1),
+            "http_calls": backend.total_calls(),
+            "calls_by_path": dict(backend.calls),
+            "peak_mem_kib": None if peak is None else round(peak / 1024),
+            "error": error,
+        })
+        if error:
+            break
+    return results
+
+
+def print_table(results):
+    print(f"{'app':<10} {'étape':<22} {'temps (ms)':>11} {'appels HTTP':>12} {'pic mém. (KiB)':>15}")
+    for r in results:
+        mem = "-" if r["peak_mem_kib"] is None else r["peak_mem_kib"]
+        print(f"{r['app']:<10} {r['step']:<22} {r['wall_ms']:>11} {r['http_calls']:>12} {mem:>15}")
+        if r["error"]:
+            print(f"    ! {r['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--apps", nargs="+", default=list(APPS), choices=list(APPS))
+    parser.add_argument("--offers", type=int, default=5000)
+    parser.add_argument("--villes", type=int, default=500)
+    parser.add_argument("--skills", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--settle-ms", type=float, default=200)
+    parser.add_argument("--no-memory", action="store_true", help="désactive tracemalloc (temps plus fidèles)")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier")
+    parser.add_argument("--max-rerun-ms", type=float)
+    parser.add_argument("--max-calls", type=int)
+    args = parser.parse_args()
+
+    backend = MockBackend(SyntheticData(args.offers, args.villes, args.skills),
+                          args.latency_ms, args.jitter_ms).start()
+    os.environ["API_BASE_URL"] = backend.url
+    try:
+        results = []
+        for script in args.apps:
+            results += run_app(script, backend, args.settle_ms, not args.no_memory)
+    finally:
+        backend.stop()
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    failed = any(r["error"] for r in results)
+    if args.max_rerun_ms is not None:
+        failed |= any(r["wall_ms"] > args.max_rerun_ms for r in results)
+    if args.max_calls is not None:
+        failed |= any(r["http_calls"] > args.max_calls for r in results)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
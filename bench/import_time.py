@@ -0,0 +1,109 @@
+"""Coût d'import des points d'entrée, mesuré avec `python -X importtime`.
+
+Chaque module est importé dans un interpréteur neuf, `--repeat` fois (on
+garde le meilleur essai) ; le temps retenu est le cumul de la ligne du module
+lui-même, c'est-à-dire tout ce que son import a chargé. Les dépendances
+directes les plus coûteuses sont listées pour repérer une régression.
+
+`--forbid` ne vise que les paquets dont l'application décide de l'import :
+ceux que charge déjà `import streamlit` seul (plotly, PIL...) sont écartés du
+contrôle (`--baseline`).
+
+    python -m bench.import_time
+    python -m bench.import_time --json import_time.json --max-ms 1500 --forbid pandas numpy
+
+Code de sortie 1 si un module dépasse --max-ms ou charge un module de --forbid.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["main", "main_2"]
+
+
+def parse_importtime(stderr: str):
+    """Lignes `import time:` -> [(profondeur, module, self µs, cumul µs)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module: str):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    rows = parse_importtime(proc.stderr)
+    # dernière ligne au nom du module : son import, précédé de ceux qu'il a déclenchés
+    end = max((i for i, (_, name, _, _) in enumerate(rows) if name == module), default=None)
+    if proc.returncode != 0 or end is None:
+        raise RuntimeError(f"import {module} impossible :\n{proc.stderr[-2000:]}")
+    depth = rows[end][0]
+    start = end
+    while start > 0 and rows[start - 1][0] > depth:
+        start -= 1
+    children = [(name, cumulative) for d, name, _, cumulative in rows[start:end] if d == depth + 1]
+    return {
+        "module": module,
+        "total_ms": rows[end][3] / 1000,
+        "children": sorted(children, key=lambda c: -c[1]),
+        "loaded": sorted({name for _, name, _, _ in rows[start:end + 1]}),
+    }
+
+
+def best_of(module: str, repeat: int):
+    runs = [measure(module) for _ in range(repeat)]
+    return min(runs, key=lambda r: r["total_ms"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="dépendances directes affichées par module")
+    parser.add_argument("--forbid", nargs="*", default=[],
+                        help="paquets qui ne doivent pas être chargés à l'import (ex. pandas numpy)")
+    parser.add_argument("--baseline", default="streamlit",
+                        help="module dont les imports sont tolérés par --forbid (vide : aucun)")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier")
+    parser.add_argument("--max-ms", type=float)
+    args = parser.parse_args()
+
+    failed = False
+    results = []
+    tolerated = set()
+    if args.forbid and args.baseline:
+        tolerated = {name.split(".")[0] for name in measure(args.baseline)["loaded"]}
+    for module in args.modules:
+        result = best_of(module, args.repeat)
+        forbidden = sorted(({name.split(".")[0] for name in result["loaded"]} - tolerated) & set(args.forbid))
+        results.append({
+            "module": module,
+            "total_ms": round(result["total_ms"], 1),
+            "top": [{"module": name, "ms": round(us / 1000, 1)} for name, us in result["children"][:args.top]],
+            "forbidden_loaded": forbidden,
+        })
+        failed |= bool(forbidden) or (args.max_ms is not None and result["total_ms"] > args.max_ms)
+
+    for r in results:
+        print(f"{r['module']:<12} {r['total_ms']:>9.1f} ms")
+        for child in r["top"]:
+            print(f"    {child['module']:<40} {child['ms']:>9.1f} ms")
+        if r["forbidden_loaded"]:
+            print(f"    ! chargés à l'import : {', '.join(r['forbidden_loaded'])}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
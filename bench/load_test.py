@@ -0,0 +1,429 @@
+"""Charge multi-sessions sur un serveur Streamlit local, par le websocket du navigateur.
+
+Démarre le backend de substitution (bench.mock_backend) et un serveur
+`streamlit run` pointé dessus, puis simule N utilisateurs simultanés qui
+rejouent chacun, en boucle, le parcours de la page profil : premier
+affichage, choix d'une région puis de compétences (un rerun chacun, comme
+dans le navigateur), validation du formulaire, pages suivantes et retour
+arrière (reruns du fragment des résultats). Chaque passage ouvre une
+nouvelle session websocket : le premier affichage est bien celui d'une
+session sans état. Les changements de page impossibles (résultat sur une
+seule page, aucune offre) sont comptés comme sautés, par étape.
+Chaque session tire ses filtres au hasard (graine fixe) : les sessions ne
+partagent pas toutes les mêmes pages en cache.
+
+Pour chaque palier de sessions simultanées : reruns par seconde, latence des
+reruns (p50/p95/p99, envoi du message -> `script_finished`) au total et par
+étape, étapes sautées, CPU et RSS du serveur (lus dans /proc), appels au
+backend par utilisateur.
+
+    python -m bench.load_test --users 1 5 10 20 --duration-s 30 --latency-ms 150
+    python -m bench.load_test --app main.py --users 10 --max-p95-ms 1500 --json load.json
+
+Les rafraîchissements automatiques (`run_every` du panneau de statistiques)
+ne sont pas rejoués. Code de sortie 1 si un rerun échoue ou si --max-p95-ms
+est dépassé.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.apptest_bench import APPS, SUBMIT_LABEL  # noqa: E402
+from bench.mock_backend import MockBackend, SyntheticData  # noqa: E402
+
+# navigation de main.py : radio de la sidebar
+NAV_LABELS = {"main.py": "Choisissez une page :"}
+SUCCESS = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY}
+RERUN_TIMEOUT_SECONDS = 60
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_BYTES = os.sysconf("SC_PAGE_SIZE")
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+class Widget:
+    __slots__ = ("id", "kind", "label", "options", "form_id", "submit", "fragment_id", "disabled")
+
+    def __init__(self, kind, proto, fragment_id):
+        self.id = proto.id
+        self.kind = kind
+        self.label = getattr(proto, "label", "")
+        self.options = list(getattr(proto, "options", ()))
+        self.form_id = getattr(proto, "form_id", "")
+        self.submit = getattr(proto, "is_form_submitter", False)
+        self.fragment_id = fragment_id
+        self.disabled = getattr(proto, "disabled", False)
+
+
+class Session:
+    """Un onglet de navigateur : widgets affichés, valeurs envoyées, reruns chronométrés."""
+
+    def __init__(self, url, app, rng):
+        self.url = url
+        self.app = app
+        self.labels = APPS[app]
+        self.rng = rng
+        self.widgets = {}       # id -> Widget du dernier rendu
+        self.values = {}        # id -> WidgetState envoyé à chaque rerun
+        self.ws = None
+
+    async def __aenter__(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.ws.close()
+
+    def find(self, kind, key=None, label=None, form=None, submit=None):
+        for w in self.widgets.values():
+            if w.kind != kind or (label is not None and w.label != label):
+                continue
+            if key is not None and f"-{key}-" not in w.id:
+                continue
+            if form is not None and bool(w.form_id) != form:
+                continue
+            if submit is not None and w.submit != submit:
+                continue
+            return w
+        raise LookupError(f"widget introuvable : {kind} {key or label!r}")
+
+    def _state(self, widget, **value):
+        state = self.values[widget.id] = WidgetState(id=widget.id)
+        for field, v in value.items():
+            target = getattr(state, field)
+            if isinstance(v, list):
+                target.data.extend(v)
+            else:
+                setattr(state, field, v)
+
+    async def rerun(self, trigger=None, fragment_id=""):
+        """Envoie un rerun (clic sur `trigger` éventuel) ; retourne (secondes, erreur ou None).
+
+        Une étape qui n'a rien à faire (bouton absent ou désactivé) retourne
+        (None, None) : elle est comptée comme sautée.
+        """
+        msg = BackMsg()
+        client = msg.rerun_script
+        client.query_string = ""
+        client.page_script_hash = ""
+        client.fragment_id = fragment_id
+        live = set(self.widgets) if self.widgets else None
+        for wid, state in self.values.items():
+            if live is None or wid in live:
+                client.widget_states.widgets.add().CopyFrom(state)
+        if trigger is not None:
+            client.widget_states.widgets.add(id=trigger.id, trigger_value=True)
+        if not fragment_id:
+            self.widgets = {}
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        error = None
+        while True:
+            raw = await asyncio.wait_for(self.ws.recv(), RERUN_TIMEOUT_SECONDS)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                ek = element.WhichOneof("type")
+                if ek == "exception":
+                    error = error or f"exception : {element.exception.message}"
+                elif ek == "alert" and element.alert.format == element.alert.ERROR:
+                    error = error or element.alert.body
+                else:
+                    proto = getattr(element, ek) if ek else None
+                    if getattr(proto, "id", ""):
+                        self.widgets[proto.id] = Widget(ek, proto, fwd.delta.fragment_id)
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if fwd.script_finished not in SUCCESS:
+                    error = error or f"script_finished={fwd.script_finished}"
+                return time.perf_counter() - start, error
+
+    def steps(self):
+        """Étapes (nom, coroutine) d'un passage du parcours, pour une session neuve."""
+        async def first():
+            return await self.rerun()
+
+        async def nav():
+            radio = self.find("radio", label=NAV_LABELS[self.app])
+            self._state(radio, string_value=self.labels["page"])
+            return await self.rerun()
+
+        async def region():
+            w = self.find("multiselect", key="geo_regions")
+            self._state(w, string_array_value=[self.rng.choice(w.options)])
+            return await self.rerun()
+
+        async def skills():
+            w = self.find("multiselect", key="skills")
+            self._state(w, string_array_value=self.rng.sample(w.options, min(2, len(w.options))))
+            return await self.rerun()
+
+        async def submit():
+            return await self.rerun(self.find("button", label=SUBMIT_LABEL, submit=True))
+
+        def page(label):
+            async def click():
+                try:
+                    button = self.find("button", label=label)
+                except LookupError:     # aucune offre : pas de pagination
+                    return None, None
+                if button.disabled:     # une seule page
+                    return None, None
+                return await self.rerun(button, button.fragment_id)
+            return click
+
+        steps = [("premier affichage", first)]
+        if self.labels["page"]:
+            steps.append(("page profil", nav))
+        steps += [
+            ("choix de la région", region),
+            ("choix des compétences", skills),
+            ("recherche", submit),
+            ("page suivante", page(self.labels["next"])),
+            ("page suivante", page(self.labels["next"])),
+            ("page précédente", page(self.labels["prev"])),
+        ]
+        return steps
+
+
+class ProcessSampler:
+    """CPU (%) et RSS d'un process, échantillonnés dans /proc."""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu, self.rss = [], []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _read(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = int(fields[11]) + int(fields[12])      # utime + stime
+        rss = int(fields[21]) * PAGE_BYTES
+        return ticks, rss
+
+    def _run(self):
+        ticks, _ = self._read()
+        last = time.monotonic()
+        while not self._stop.wait(self.interval):
+            try:
+                now_ticks, rss = self._read()
+            except OSError:
+                return
+            now = time.monotonic()
+            self.cpu.append(100 * (now_ticks - ticks) / CLOCK_TICKS / (now - last))
+            self.rss.append(rss)
+            ticks, last = now_ticks, now
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self):
+        return {
+            "cpu_mean_pct": round(sum(self.cpu) / len(self.cpu), 1) if self.cpu else None,
+            "cpu_max_pct": round(max(self.cpu), 1) if self.cpu else None,
+            "rss_max_mib": round(max(self.rss) / 2 ** 20, 1) if self.rss else None,
+        }
+
+
+async def _user(n, url, app, deadline, think_ms, seed, ramp_s, samples):
+    await asyncio.sleep(ramp_s * n)
+    rng = random.Random(seed + n)
+    while time.monotonic() < deadline:
+        try:
+            # une session neuve par passage : le premier affichage part d'un état vide
+            async with Session(url, app, rng) as session:
+                for name, step in session.steps():
+                    if time.monotonic() >= deadline:
+                        return
+                    try:
+                        seconds, error = await step()
+                    except Exception as e:
+                        seconds, error = None, repr(e)
+                    samples.append((name, seconds, error))
+                    if error:
+                        return
+                    await asyncio.sleep(rng.uniform(0.5, 1.5) * think_ms / 1000)
+        except Exception as e:
+            samples.append(("connexion", None, repr(e)))
+            return
+
+
+def run_level(users, url, app, backend, pid, duration_s, think_ms, seed, ramp_s):
+    backend.reset()
+    samples = []
+    deadline = time.monotonic() + duration_s
+
+    async def all_users():
+        await asyncio.gather(*(_user(n, url, app, deadline, think_ms, seed, ramp_s / max(users, 1), samples)
+                               for n in range(users)))
+
+    sampler = ProcessSampler(pid) if pid else None
+    start = time.perf_counter()
+    if sampler is not None:
+        with sampler:
+            asyncio.run(all_users())
+    else:
+        asyncio.run(all_users())
+    elapsed = time.perf_counter() - start
+
+    timed = [(name, s) for name, s, error in samples if s is not None]
+    skipped = defaultdict(int)
+    for name, s, error in samples:
+        if s is None and error is None:
+            skipped[name] += 1
+    latencies = [s * 1000 for _, s in timed]
+    by_step = defaultdict(list)
+    for name, s in timed:
+        by_step[name].append(s * 1000)
+    result = {
+        "users": users,
+        "reruns": len(timed),
+        "reruns_per_s": round(len(timed) / elapsed, 2),
+        "p50_ms": _round(percentile(latencies, 50)),
+        "p95_ms": _round(percentile(latencies, 95)),
+        "p99_ms": _round(percentile(latencies, 99)),
+        "steps": {name: {"n": len(v), "p50_ms": _round(percentile(v, 50)), "p95_ms": _round(percentile(v, 95))}
+                  for name, v in by_step.items()},
+        "skipped": dict(skipped),
+        "backend_calls": backend.total_calls(),
+        "backend_calls_per_user": round(backend.total_calls() / max(users, 1), 1),
+        "calls_by_path": dict(backend.calls),
+        "errors": [error for _, _, error in samples if error][:10],
+    }
+    if sampler is not None:
+        result.update(sampler.summary())
+    return result
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, backend_url, port, timeout=60):
+    env = dict(os.environ, API_BASE_URL=backend_url)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, app), f"--server.port={port}",
+         "--server.address=127.0.0.1", "--server.headless=true", "--browser.gatherUsageStats=false",
+         "--server.fileWatcherType=none"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"le serveur Streamlit s'est arrêté (code {proc.returncode})")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("le serveur Streamlit ne répond pas")
+
+
+def print_table(results):
+    print(f"{'sessions':>8} {'reruns/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'CPU moy.':>9} {'RSS max':>9} {'appels/utilisateur':>18}")
+    for r in results:
+        cpu = "-" if r.get("cpu_mean_pct") is None else f"{r['cpu_mean_pct']}%"
+        rss = "-" if r.get("rss_max_mib") is None else f"{r['rss_max_mib']} Mo"
+        print(f"{r['users']:>8} {r['reruns_per_s']:>9} {r['p50_ms'] or '-':>9} {r['p95_ms'] or '-':>9} "
+              f"{r['p99_ms'] or '-':>9} {cpu:>9} {rss:>9} {r['backend_calls_per_user']:>18}")
+        for name, s in r["steps"].items():
+            print(f"{'':>8}   {name:<24} n={s['n']:<5} p50={s['p50_ms']} ms  p95={s['p95_ms']} ms")
+        for name, n in r["skipped"].items():
+            print(f"{'':>8}   {name:<24} sautée {n} fois (une seule page ou aucune offre)")
+        for error in r["errors"]:
+            print(f"    ! {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="main_2.py", choices=list(APPS))
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10], help="paliers de sessions simultanées")
+    parser.add_argument("--duration-s", type=float, default=20, help="durée de chaque palier")
+    parser.add_argument("--ramp-s", type=float, default=2, help="étalement des connexions d'un palier")
+    parser.add_argument("--think-ms", type=float, default=300, help="pause moyenne entre deux actions")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", help="serveur déjà lancé (ex. http://localhost:8501) ; sinon un serveur est démarré")
+    parser.add_argument("--server-pid", type=int, help="process à mesurer avec --url")
+    parser.add_argument("--offers", type=int, default=20000)
+    parser.add_argument("--villes", type=int, default=500)
+    parser.add_argument("--skills", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier")
+    parser.add_argument("--max-p95-ms", type=float)
+    args = parser.parse_args()
+
+    backend = MockBackend(SyntheticData(args.offers, args.villes, args.skills),
+                          args.latency_ms, args.jitter_ms).start()
+    server = None
+    try:
+        if args.url:
+            base, pid = args.url.rstrip("/"), args.server_pid
+        else:
+            port = _free_port()
+            server = start_server(args.app, backend.url, port)
+            base, pid = f"http://127.0.0.1:{port}", server.pid
+        ws_url = base.replace("http", "ws", 1) + "/_stcore/stream"
+        results = [run_level(users, ws_url, args.app, backend, pid, args.duration_s, args.think_ms, args.seed,
+                             args.ramp_s)
+                   for users in args.users]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+        backend.stop()
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    failed = any(r["errors"] for r in results)
+    if args.max_p95_ms is not None:
+        failed |= any(r["p95_ms"] is not None and r["p95_ms"] > args.max_p95_ms for r in results)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Backend de substitution local pour mesurer l'app sans appeler Render.
+
+Implémente /candidat/{ville,departement,region,contrat}, /skills/ et /search
+(projection `fields=...` comprise, réponses gzip si le client les accepte)
+sur des données synthétiques de taille réglable, avec une latence injectée
+par requête. Les appels sont comptés par chemin (GET /__stats pour les lire,
+/__stats?reset=1 pour les remettre à zéro).
+
+    python -m bench.mock_backend --port 8000 --offers 20000 --latency-ms 300
+    API_BASE_URL=http://localhost:8000 streamlit run main.py
+"""
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DATE_FILTER_DAYS = {"last_24h": 1, "last_3_days": 3, "last_7_days": 7}
+CONTRATS = ["CDI", "CDD", "Stage", "Alternance", "Freelance", "Intérim"]
+
+
+class SyntheticData:
+    """Référentiels et offres générés de façon déterministe à partir d'une graine."""
+
+    def __init__(self, n_offers=5000, n_villes=500, n_skills=300, seed=42):
+        rng = random.Random(seed)
+        self.regions = [f"Région {i:02d}" for i in range(13)]
+        self.departements = [f"Département {i:03d}" for i in range(96)]
+        dept_region = self.dept_region = {d: self.regions[i % len(self.regions)] for i, d in enumerate(self.departements)}
+        self.villes = [f"Ville {i:05d}" for i in range(n_villes)]
+        ville_dept = self.ville_dept = {v: self.departements[i % len(self.departements)] for i, v in enumerate(self.villes)}
+        self.skills = [f"Skill {i:04d}" for i in range(n_skills)]
+        self.contrats = CONTRATS
+
+        now = datetime.now()
+        self.offers = []
+        self._offer_skills = []
+        for i in range(n_offers):
+            ville = rng.choice(self.villes)
+            dept = ville_dept[ville]
+            offer_skills = rng.sample(self.skills, rng.randint(2, 12))
+            self._offer_skills.append(frozenset(offer_skills))
+            self.offers.append({
+                "ID": i,
+                "TITLE": f"Offre {i} – Data Engineer",
+                "VILLE": ville,
+                "DEPARTEMENT": dept,
+                "REGION": dept_region[dept],
+                "TYPE_CONTRAT": rng.choice(self.contrats),
+                "SOURCE_URL": f"https://example.org/offres/{i}",
+                "SKILLS": repr(offer_skills),
+                "DATE_PUBLICATION": (now - timedelta(hours=rng.randint(0, 24 * 30))).isoformat(timespec="seconds"),
+            })
+
+    def search(self, query: dict):
+        filters = [
+            ("VILLE", set(query.get("ville", []))),
+            ("DEPARTEMENT", set(query.get("departement", []))),
+            ("REGION", set(query.get("region", []))),
+            ("TYPE_CONTRAT", set(query.get("contrat", []))),
+        ]
+        skills = set(query.get("skill", []))
+        since = None
+        if query.get("date_filter"):
+            days = DATE_FILTER_DAYS.get(query["date_filter"][0], 0)
+            since = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+
+        matches = []
+        for offer, offer_skills in zip(self.offers, self._offer_skills):
+            if any(values and offer[field] not in values for field, values in filters):
+                continue
+            if skills and not skills & offer_skills:
+                continue
+            if since and offer["DATE_PUBLICATION"] < since:
+                continue
+            matches.append(offer)
+
+        limit = int(query.get("limit", ["20"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        page = matches[offset:offset + limit]
+        if query.get("fields"):
+            fields = query["fields"][0].split(",")
+            page = [{f: offer[f] for f in fields if f in offer} for offer in page]
+        return {"data": page, "total_count": len(matches)}
+
+
+class MockBackend:
+    """Serveur HTTP du backend de substitution, dans un thread."""
+
+    def __init__(self, data: SyntheticData, latency_ms: float = 0, jitter_ms: float = 0,
+                 host="127.0.0.1", port=0):
+        self.data = data
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-backend", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+    def _route(self, path: str, query: dict):
+        data = self.data
+        if path == "/candidat/ville":
+            return {"data": [[v, data.ville_dept[v], data.dept_region[data.ville_dept[v]]] for v in data.villes]}
+        if path == "/candidat/departement":
+            return {"data": [[d, data.dept_region[d]] for d in data.departements]}
+        if path == "/candidat/region":
+            return {"data": [[r] for r in data.regions]}
+        if path == "/candidat/contrat":
+            return {"data": [[c] for c in data.contrats]}
+        if path == "/skills/":
+            return [{"skill": s} for s in data.skills]
+        if path == "/search":
+            return data.search(query)
+        return None
+
+    def _handler(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, comme derrière Render
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path == "/__stats":
+                    with backend._lock:
+                        body = dict(backend.calls)
+                        if "reset" in query:
+                            backend.calls.clear()
+                    return self._send(200, body)
+
+                with backend._lock:
+                    backend.calls[url.path] += 1
+                delay = backend.latency_ms + random.uniform(0, backend.jitter_ms)
+                if delay:
+                    time.sleep(delay / 1000)
+                body = backend._route(url.path, query)
+                if body is None:
+                    return self._send(404, {"detail": "Not Found"})
+                self._send(200, body)
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    payload = gzip.compress(payload, compresslevel=5)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--offers", type=int, default=5000)
+    parser.add_argument("--villes", type=int, default=500)
+    parser.add_argument("--skills", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    data = SyntheticData(args.offers, args.villes, args.skills)
+    backend = MockBackend(data, args.latency_ms, args.jitter_ms, args.host, args.port)
+    print(f"Backend de substitution sur {backend.url} ({args.offers} offres)")
+    try:
+        backend.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Référentiel des communes françaises : centre, département, région, population.
+
+Téléchargé depuis geo.api.gouv.fr au premier besoin puis gardé sur disque
+(`COMMUNES_PATH`, rafraîchi après `COMMUNES_MAX_AGE_DAYS` jours) ; si l'API
+ne répond pas, la dernière copie locale est utilisée. Les noms sont comparés
+sans casse, accents, tirets ni apostrophes : « SAINT-ETIENNE » et
+« Saint-Étienne » désignent la même commune. Entre homonymes, la plus peuplée
+l'emporte.
+"""
+import json
+import os
+import re
+import threading
+import time
+
+import api_client
+import tracing
+from skill_search import fold
+
+GEO_API_URL = os.getenv("GEO_API_URL", "https://geo.api.gouv.fr")
+COMMUNES_PATH = os.getenv("COMMUNES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "communes.json"))
+COMMUNES_MAX_AGE_DAYS = float(os.getenv("COMMUNES_MAX_AGE_DAYS", 30))
+COMMUNES_RETRY_SECONDS = 60
+
+_SEPARATORS = re.compile(r"[\s\-'’]+")
+
+
+def name_key(name: str) -> str:
+    return _SEPARATORS.sub(" ", fold(name)).strip()
+
+
+class Commune:
+    __slots__ = ("nom", "lat", "lon", "departement", "region", "population")
+
+    def __init__(self, nom, lat, lon, departement, region, population):
+        self.nom = nom
+        self.lat = lat
+        self.lon = lon
+        self.departement = departement      # nom du département
+        self.region = region                # nom de la région
+        self.population = population
+
+
+class CommuneTable:
+    def __init__(self, raw: dict):
+        departements = {d["code"]: d["nom"] for d in raw["departements"]}
+        regions = {r["code"]: r["nom"] for r in raw["regions"]}
+        self.communes = []
+        self._by_name = {}
+        for c in raw["communes"]:
+            centre = (c.get("centre") or {}).get("coordinates")
+            if not centre:
+                continue
+            commune = Commune(c["nom"], centre[1], centre[0], departements.get(c.get("codeDepartement")),
+                              regions.get(c.get("codeRegion")), c.get("population") or 0)
+            self.communes.append(commune)
+            key = name_key(commune.nom)
+            known = self._by_name.get(key)
+            if known is None or commune.population > known.population:
+                self._by_name[key] = commune
+
+    def lookup(self, name):
+        """Commune portant ce nom (la plus peuplée entre homonymes), ou None."""
+        return self._by_name.get(name_key(name)) if name else None
+
+
+def _download() -> dict:
+    with tracing.span("communes_download"):
+        communes = api_client.get_json(
+            f"{GEO_API_URL}/communes",
+            params={"fields": "nom,centre,codeDepartement,codeRegion,population", "format": "json"},
+            timeout=(5, 60))
+        departements = api_client.get_json(f"{GEO_API_URL}/departements", params={"fields": "nom,code"})
+        regions = api_client.get_json(f"{GEO_API_URL}/regions", params={"fields": "nom,code"})
+    return {"communes": communes, "departements": departements, "regions": regions}
+
+
+def _read_disk():
+    try:
+        with open(COMMUNES_PATH, encoding="utf-8") as f:
+            return json.load(f), os.path.getmtime(COMMUNES_PATH)
+    except (OSError, ValueError):
+        return None, 0.0
+
+
+def _write_disk(raw: dict):
+    os.makedirs(os.path.dirname(COMMUNES_PATH), exist_ok=True)
+    tmp = f"{COMMUNES_PATH}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(raw, f, ensure_ascii=False)
+    os.replace(tmp, COMMUNES_PATH)
+
+
+_table = None
+_table_lock = threading.Lock()
+_failure = (0.0, None)      # (horodatage, exception) du dernier échec sans copie locale
+
+
+def get_communes() -> CommuneTable:
+    """Table des communes du process, chargée au premier appel (disque, sinon API).
+
+    Sans copie locale, un échec du téléchargement est renvoyé tel quel
+    pendant `COMMUNES_RETRY_SECONDS` au lieu de retenter à chaque appel.
+    """
+    global _table, _failure
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                raw, mtime = _read_disk()
+                if raw is None or time.time() - mtime > COMMUNES_MAX_AGE_DAYS * 86400:
+                    failed_at, error = _failure
+                    if raw is None and error is not None and time.monotonic() - failed_at < COMMUNES_RETRY_SECONDS:
+                        raise error
+                    try:
+                        raw = _download()
+                        _write_disk(raw)
+                    except Exception as e:
+                        if raw is None:
+                            _failure = (time.monotonic(), e)
+                            raise
+                _table = CommuneTable(raw)
+    return _table
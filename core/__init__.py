@@ -0,0 +1,11 @@
+"""Code commun aux deux points d'entrée (main.py, main_2.py).
+
+- `core.config` : chargement du `.env` et variables de l'application ; à
+  importer avant les autres modules, qui lisent l'environnement à l'import ;
+- `core.search` : filtres et résultats de l'espace candidat ;
+- `core.ui` : petits composants partagés (Power BI, défilement, pagination).
+
+Les dépendances lourdes (pandas, numpy, Pillow) ne sont
+importées qu'au moment où une page en a besoin : `python -m bench.import_time`
+suit le coût d'import de chaque point d'entrée.
+"""
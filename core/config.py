@@ -0,0 +1,10 @@
+"""Configuration de l'application, lue dans l'environnement (fichier `.env` accepté)."""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+API_BASE_URL = os.getenv("API_BASE_URL", "https://back-end-render-dg5f.onrender.com")
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", 20))
+LOCAL_ENGINE = os.getenv("LOCAL_ENGINE", "") not in ("", "0", "false")
@@ -0,0 +1,105 @@
+"""Filtres et résultats de l'espace candidat, communs aux deux applications."""
+import streamlit as st
+
+import api_client
+from core.config import API_BASE_URL
+from export import export_panel
+from geo_index import get_geo_index
+from nearby import near_me_picker
+from pagination import fetch_page
+from prefetch import get_prefetcher
+from search_cache import canonical_key
+from skill_stats import analytics_panel
+from vocab_cache import load_vocabularies
+
+api_client.start_keep_warm(API_BASE_URL)
+
+# clés de session des sélections géographiques (hors formulaire)
+GEO_STATE_KEYS = ("geo_villes", "geo_departements", "geo_regions")
+
+
+def filter_options():
+    """Vocabulaires des filtres et index géographique.
+
+    Une liste indisponible est signalée et remplacée par une liste vide ; les
+    listes géographiques sont déjà restreintes aux sélections en cours.
+    """
+    vocab, vocab_errors = load_vocabularies(API_BASE_URL)
+    for name, err in vocab_errors.items():
+        st.warning(f"Liste « {name} » indisponible : {err}")
+    geo = get_geo_index(API_BASE_URL)
+    vocab = dict(vocab)
+    vocab["villes"], vocab["departements"], vocab["regions"] = geo.narrow(
+        vocab["villes"], vocab["departements"], vocab["regions"],
+        *(st.session_state.get(key, []) for key in GEO_STATE_KEYS),
+    )
+    return vocab, geo
+
+
+def near_me():
+    """Villes du filtre « autour de moi », ou None s'il est inactif."""
+    vocab, _ = load_vocabularies(API_BASE_URL)
+    return near_me_picker(vocab.get("villes") or [])
+
+
+def submit_search(villes=(), departements=(), regions=(), skills=(), contrats=(), date_filter=None, nearby=None):
+    """Enregistre les filtres validés et revient à la première page.
+
+    `nearby` : villes du filtre « autour de moi », ajoutées aux villes choisies.
+    """
+    if nearby is not None:
+        if not nearby:
+            st.warning("Aucune ville connue dans ce rayon : élargissez-le.")
+            return
+        villes = list(dict.fromkeys([*villes, *nearby]))
+    params = []
+    for v in villes: params.append(("ville", v))
+    for d in departements: params.append(("departement", d))
+    for r in regions: params.append(("region", r))
+    for s in skills: params.append(("skill", s))
+    for c in contrats: params.append(("contrat", c))
+    if date_filter:
+        params.append(("date_filter", date_filter))
+    if canonical_key(params) != canonical_key(st.session_state.get("search_params", [])):
+        get_prefetcher(st.session_state).cancel()   # pages suivantes des anciens filtres : inutiles
+    st.session_state.search_params = params
+    st.session_state.page = 0
+
+
+def fetch_results(limit: int):
+    """Page courante des derniers filtres validés : (offres, total, nombre de pages).
+
+    Signale une réponse ancienne (backend en cours de réveil) et lance le
+    préchargement des pages suivantes. Les erreurs API remontent à l'appelant.
+    """
+    if "page" not in st.session_state:
+        st.session_state.page = 0
+    filter_params = st.session_state.get("search_params", [])
+    data = fetch_page(API_BASE_URL, filter_params, st.session_state.page, limit)
+    if data.get("stale"):
+        st.info("⏳ Le backend se réveille : derniers résultats connus affichés.")
+    offres = data.get("data", [])
+    total_count = data.get("total_count", 0)
+    total_pages = max((total_count + limit - 1) // limit, 1)
+    if offres:
+        get_prefetcher(st.session_state).schedule(API_BASE_URL, filter_params, st.session_state.page,
+                                                  limit, total_pages)
+    return offres, total_count, total_pages
+
+
+def export_results(limit: int, total_count: int):
+    """Export de toutes les offres des derniers filtres validés."""
+    with st.expander("⬇️ Exporter toutes les offres"):
+        export_panel(API_BASE_URL, st.session_state.get("search_params", []), limit, total_count)
+
+
+def skill_analytics(limit: int):
+    """Top compétences et co-occurrences sur toutes les offres des derniers filtres validés.
+
+    Rien n'est calculé tant qu'aucune recherche n'a été lancée : le parcours
+    de toute la table ne démarre pas au simple affichage de la page.
+    """
+    if "search_params" not in st.session_state:
+        st.caption("Lancez une recherche pour analyser les compétences de ses offres.")
+        return
+    analytics_panel(API_BASE_URL, st.session_state.search_params, limit)
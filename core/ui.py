@@ -0,0 +1,44 @@
+"""Composants d'interface partagés."""
+import streamlit as st
+
+
+def powerbi_iframe(report_url: str, width: int, height: int, frame_width: int, frame_height: int):
+    """Rapport Power BI publié, intégré dans une iframe."""
+    import streamlit.components.v1 as components
+
+    components.html(f"""
+    <iframe title="Back-to-Basic" width="{width}" height="{height}"
+    src="{report_url}"
+    frameborder="0" allowFullScreen="true"></iframe>
+    """, height=frame_height, width=frame_width)
+
+
+def scroll_to_top_if_requested():
+    """Remonte en haut de page après un changement de page de résultats.
+
+    Simple script dans une iframe de hauteur nulle : pas d'aller-retour avec
+    le navigateur ni de rerun supplémentaire. Le compteur change le contenu à
+    chaque demande, sinon l'iframe serait conservée telle quelle.
+    """
+    if st.session_state.get("scroll_to_top", False):
+        import streamlit.components.v1 as components
+
+        st.session_state.scroll_nonce = st.session_state.get("scroll_nonce", 0) + 1
+        components.html(_SCROLL_TOP_JS.replace("NONCE", str(st.session_state.scroll_nonce)), height=0)
+        st.session_state.scroll_to_top = False
+
+
+def turn_page(delta: int):
+    """Callback des boutons de pagination : exécuté avant le rerun du fragment de résultats."""
+    st.session_state.page += delta
+    st.session_state.scroll_to_top = True
+
+
+_SCROLL_TOP_JS = """<script>/* NONCE */
+const doc = window.parent.document;
+for (const el of [doc.querySelector('[data-testid="stMain"]'), doc.querySelector('section.main'),
+                  doc.querySelector('[data-testid="stAppViewContainer"]')]) {
+  if (el) el.scrollTo(0, 0);
+}
+window.parent.scrollTo(0, 0);
+</script>"""
@@ -0,0 +1,117 @@
+"""Valeurs partagées par le process et recalculées seulement quand il le faut.
+
+`RefreshingCache` garde des valeurs avec un TTL et les rafraîchit en tâche de
+fond une fois périmées (stale-while-revalidate) ; `Derived` reconstruit une
+valeur (index...) seulement quand l'une de ses sources change ; `next_version`
+date une valeur pour servir de clé aux caches qui en dépendent.
+"""
+import itertools
+import threading
+import time
+
+_versions = itertools.count(1)
+
+
+def next_version() -> int:
+    """Numéro croissant, unique dans le process, pour distinguer deux valeurs successives."""
+    return next(_versions)
+
+
+class Derived:
+    """Valeur construite à partir de sources, reconstruite seulement quand l'une d'elles change.
+
+    Les sources de la dernière construction sont gardées et comparées par
+    identité : une liste libérée ne peut pas être confondue avec une nouvelle
+    qui réutiliserait son id().
+    """
+
+    def __init__(self, build):
+        self._build = build
+        self._current = None    # (sources, valeur)
+        self._lock = threading.Lock()
+
+    def get(self, *sources):
+        with self._lock:
+            current = self._current
+        if current is not None and all(a is b for a, b in zip(current[0], sources)):
+            return current[1]
+        value = self._build(*sources)
+        with self._lock:
+            self._current = (sources, value)
+        return value
+
+    def reset(self):
+        with self._lock:
+            self._current = None
+
+
+class RefreshingCache:
+    """Cache clé -> valeur avec TTL et rafraîchissement en arrière-plan."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries = {}      # clé -> (valeur, horodatage)
+        self._refreshing = set()
+        self._loading = {}      # clé -> verrou du chargement bloquant
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """Retourne la valeur de `key`, en appelant `loader()` si besoin.
+
+        Entrée absente : chargement bloquant, un seul à la fois par clé (les
+        appels concurrents attendent son résultat). Entrée périmée : la valeur
+        connue est servie immédiatement et un rafraîchissement est lancé.
+        """
+        value = self.lookup(key, loader)
+        if value is not None:
+            return value
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def lookup(self, key, loader):
+        """Comme `get`, sans chargement bloquant : None si la clé est absente."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            self._refresh_in_background(key, loader)
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+
+    def invalidate(self, key=None):
+        """Oublie `key`, ou tout le cache si `key` vaut None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.set(key, loader())
+            except Exception:
+                pass  # on garde la valeur périmée, nouvel essai au prochain accès
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"cache-refresh-{key}", daemon=True).start()
@@ -0,0 +1,253 @@
+"""Export de toutes les offres d'un jeu de filtres, en CSV ou en Parquet.
+
+Les pages de /search sont demandées sur le pool de `api_client` avec au plus
+`EXPORT_CONCURRENCY` requêtes en vol, et chaque page est écrite dans le
+fichier dès son tour venu puis oubliée : la mémoire reste bornée à la fenêtre
+de pages en cours, quel que soit le nombre d'offres.
+
+Un bloc dont toutes les pages d'affichage sont déjà dans le cache de /search
+(pages consultées ou préchargées) est repris tel quel, si ces pages ont les
+champs dont l'appelant a besoin : elles sont réduites aux champs affichés,
+ce qui sert l'analyse des compétences mais pas l'export, qui veut toutes les
+colonnes (sauf `OFFER_FIELDS` vide). Les autres blocs ne sont pas rangés dans
+le cache, pour ne pas en chasser les pages de navigation.
+Le Parquet demande pyarrow ; toutes ses colonnes sont du texte, les listes
+(SKILLS) y sont écrites en JSON comme dans le CSV.
+
+Le fichier n'est lu qu'au clic sur le bouton de téléchargement, puis
+supprimé ; ceux jamais téléchargés le sont après `EXPORT_MAX_AGE_SECONDS`.
+"""
+import csv
+import importlib.util
+import json
+import os
+import tempfile
+import time
+from collections import deque
+
+import api_client
+import offers
+from pagination import page_params
+from search_cache import SEARCH_CACHE, canonical_key, search
+
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", 500))
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", 4))
+EXPORT_DIR = os.getenv("EXPORT_DIR", tempfile.gettempdir())
+EXPORT_MAX_AGE_SECONDS = float(os.getenv("EXPORT_MAX_AGE_SECONDS", 3600))
+EXPORT_PREFIX = "offres-"
+
+MIME_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def available_formats() -> list:
+    return ["csv", "parquet"] if importlib.util.find_spec("pyarrow") else ["csv"]
+
+
+def _cell(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class _CsvWriter:
+    def __init__(self, path, columns):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=columns, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows({k: _cell(v) for k, v in row.items()} for row in rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    """Un groupe de lignes Parquet par bloc de pages."""
+
+    def __init__(self, path, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.columns = columns
+        self.schema = pa.schema([(c, pa.string()) for c in columns])
+        self._writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        if rows:
+            arrays = [self._pa.array([_cell(row.get(c)) for row in rows], type=self._pa.string())
+                      for c in self.columns]
+            self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+WRITERS = {"csv": _CsvWriter, "parquet": _ParquetWriter}
+
+
+def _cached_block(filter_params, offset, size, display_limit, fields=None):
+    """Bloc reconstitué depuis les pages d'affichage en cache, ou None."""
+    if not display_limit or offset % display_limit or size % display_limit or not offers.covers(fields):
+        return None
+    keys = [canonical_key(page_params(filter_params, n, display_limit))
+            for n in range(offset // display_limit, (offset + size) // display_limit)]
+    pages = [SEARCH_CACHE.get(key) if key in SEARCH_CACHE else None for key in keys]
+    if any(page is None for page in pages):
+        return None
+    rows = [row for page in pages for row in page.get("data", [])]
+    return {"data": rows, "total_count": pages[0].get("total_count", len(rows))}
+
+
+def _block(api_base_url, filter_params, offset, size, display_limit, fields=None):
+    cached = _cached_block(filter_params, offset, size, display_limit, fields)
+    if cached is not None:
+        return cached
+    params = list(filter_params) + [("limit", size), ("offset", offset)]
+    return search(api_base_url, params, store=False, fields=fields)
+
+
+def iter_blocks(api_base_url: str, filter_params, display_limit=None, page_size: int = EXPORT_PAGE_SIZE,
+                concurrency: int = EXPORT_CONCURRENCY, fields=None):
+    """Toutes les offres de `filter_params`, par blocs : génère (lignes du bloc, total).
+
+    Au plus `concurrency` blocs sont en vol sur le pool de `api_client` ;
+    les blocs sont rendus dans l'ordre. `display_limit` : taille des pages
+    d'affichage, pour reprendre celles en cache ; `fields` : champs lus par
+    l'appelant, seuls demandés au backend (None : tous).
+    """
+    if display_limit:
+        page_size = max(page_size // display_limit, 1) * display_limit
+    first = _block(api_base_url, filter_params, 0, page_size, display_limit, fields)
+    rows = first.get("data", [])
+    total = first.get("total_count", len(rows))
+
+    offsets = iter(range(page_size, total, page_size))
+    pending = deque()
+
+    def submit_next():
+        offset = next(offsets, None)
+        if offset is not None:
+            pending.append(api_client.submit(_block, api_base_url, filter_params, offset, page_size, display_limit,
+                                             fields))
+
+    try:
+        for _ in range(concurrency):
+            submit_next()
+        while True:
+            yield rows, total
+            if not pending:
+                return
+            rows = pending.popleft().result().get("data", [])
+            submit_next()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def export_offers(api_base_url: str, filter_params, path: str, fmt: str = "csv", display_limit=None,
+                  progress=None, page_size: int = EXPORT_PAGE_SIZE, concurrency: int = EXPORT_CONCURRENCY) -> int:
+    """Écrit dans `path` toutes les offres de `filter_params` ; retourne le nombre de lignes.
+
+    `progress(écrites, total)` est appelé après chaque bloc, dans le thread
+    appelant.
+    """
+    blocks = iter_blocks(api_base_url, filter_params, display_limit, page_size, concurrency)
+    rows, total = next(blocks)
+    writer = WRITERS[fmt](path, list(dict.fromkeys(key for row in rows for key in row)))
+    written = 0
+    try:
+        while True:
+            writer.write(rows)
+            written += len(rows)
+            if progress is not None:
+                progress(written, total)
+            rows, total = next(blocks, (None, total))
+            if rows is None:
+                break
+    finally:
+        blocks.close()
+        writer.close()
+    return written
+
+
+def purge_exports(max_age: float = EXPORT_MAX_AGE_SECONDS, directory: str = EXPORT_DIR) -> int:
+    """Supprime les fichiers d'export plus vieux que `max_age` ; retourne leur nombre."""
+    limit = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(directory):
+        if entry.name.startswith(EXPORT_PREFIX) and entry.is_file():
+            try:
+                if entry.stat().st_mtime < limit:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass    # déjà servi ou purgé par une autre session
+    return removed
+
+
+def _serve_once(path: str):
+    """Contenu du fichier pour le téléchargement, lu au clic puis supprimé.
+
+    Appelé par Streamlit (≥ 1.52) dans un autre thread que le rerun du clic.
+    """
+    def read():
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            raise FileNotFoundError("Fichier d'export expiré : relancez l'export.") from None
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return data
+    return read
+
+
+def _forget_export():
+    """Le fichier est servi une seule fois : le bouton disparaît au rerun du clic."""
+    import streamlit as st
+    st.session_state.pop("export_file", None)
+
+
+def export_panel(api_base_url: str, filter_params, display_limit: int, total_count: int):
+    """Choix du format, export avec barre de progression, puis bouton de téléchargement."""
+    import streamlit as st
+
+    formats = available_formats()
+    fmt = st.radio("Format", formats, horizontal=True, key="export_format",
+                   format_func=lambda f: f.upper())
+    filters_key = canonical_key(filter_params)
+
+    if st.button(f"Préparer l'export ({total_count} offres)", key="export_start"):
+        previous = st.session_state.pop("export_file", None)
+        if previous is not None and os.path.exists(previous["path"]):
+            os.remove(previous["path"])
+        purge_exports()
+        fd, path = tempfile.mkstemp(prefix=EXPORT_PREFIX, suffix=f".{fmt}", dir=EXPORT_DIR)
+        os.close(fd)
+        bar = st.progress(0.0, text="Export en cours…")
+        try:
+            count = export_offers(api_base_url, filter_params, path, fmt, display_limit,
+                                  progress=lambda done, total: bar.progress(
+                                      min(done / max(total, 1), 1.0), text=f"{done} / {total} offres"))
+        except Exception as e:
+            os.remove(path)
+            bar.empty()
+            st.error(f"❌ Export impossible : {e}")
+            return
+        bar.empty()
+        st.session_state.export_file = {"filters": filters_key, "format": fmt, "path": path, "count": count}
+
+    export = st.session_state.get("export_file")
+    if export is not None and not os.path.exists(export["path"]):
+        st.session_state.pop("export_file")     # purgé entre-temps
+        export = None
+    if export is not None and export["filters"] == filters_key and export["format"] == fmt:
+        st.download_button(f"💾 Télécharger ({export['count']} offres)", _serve_once(export["path"]),
+                           file_name=f"offres.{fmt}", mime=MIME_TYPES[fmt], key="export_download",
+                           on_click=_forget_export)
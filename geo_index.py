@@ -0,0 +1,155 @@
+"""Hiérarchie ville → département → région et comptes d'offres par option.
+
+L'index est construit une fois à partir des lignes brutes des vocabulaires
+(quand `/candidat/ville` renvoie [ville, département, région] et
+`/candidat/departement` [département, région]) et, en mode moteur local, du
+snapshot des offres qui fournit aussi les comptes par option (table de
+facettes). Il n'est reconstruit que si l'une de ces sources change.
+
+Les listes déroulantes géographiques sont alors restreintes côté client aux
+valeurs compatibles avec les sélections des autres niveaux, sans appel API :
+on ne peut plus composer « Paris » + « Bretagne » et obtenir zéro résultat.
+"""
+import threading
+from collections import defaultdict
+
+from search_cache import local_snapshot
+from derived import Derived
+from vocab_cache import vocabulary_rows
+
+NARROW_MEMO_SIZE = 256
+
+
+class GeoIndex:
+    def __init__(self, ville_depts, dept_region, counts=None):
+        self.ville_depts = ville_depts              # ville -> {départements} (homonymes)
+        self.dept_region = dept_region              # département -> région
+        self.counts = counts or {}                  # paramètre (ville, skill...) -> {valeur: nb d'offres}
+        self.dept_villes = defaultdict(set)
+        self.region_depts = defaultdict(set)
+        self.region_villes = defaultdict(set)
+        for ville, depts in ville_depts.items():
+            for dept in depts:
+                self.dept_villes[dept].add(ville)
+                region = dept_region.get(dept)
+                if region is not None:
+                    self.region_villes[region].add(ville)
+        for dept, region in dept_region.items():
+            self.region_depts[region].add(dept)
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def narrow(self, villes, departements, regions, sel_villes=(), sel_depts=(), sel_regions=()):
+        """Options compatibles avec les sélections des autres niveaux.
+
+        Une valeur absente de l'index n'est jamais écartée ; les valeurs déjà
+        sélectionnées restent toujours proposées.
+        """
+        sel_v, sel_d, sel_r = frozenset(sel_villes), frozenset(sel_depts), frozenset(sel_regions)
+        lists = (villes, departements, regions)
+        key = (tuple(map(id, lists)), sel_v, sel_d, sel_r)
+        with self._lock:
+            cached = self._memo.get(key)
+        # les listes sont gardées avec le résultat : un id réutilisé ne sert pas un résultat périmé
+        if cached is not None and all(a is b for a, b in zip(cached[0], lists)):
+            return cached[1]
+
+        def ville_ok(v):
+            depts = self.ville_depts.get(v)
+            if depts is None:
+                return True
+            if sel_d and not depts & sel_d:
+                return False
+            return not sel_r or any(self.dept_region.get(d) in sel_r for d in depts)
+
+        def dept_ok(d):
+            if sel_r and d in self.dept_region and self.dept_region[d] not in sel_r:
+                return False
+            return not sel_v or d not in self.dept_villes or bool(self.dept_villes[d] & sel_v)
+
+        def region_ok(r):
+            if sel_d and r in self.region_depts and not self.region_depts[r] & sel_d:
+                return False
+            return not sel_v or r not in self.region_villes or bool(self.region_villes[r] & sel_v)
+
+        result = (
+            villes if not (sel_d or sel_r) else [v for v in villes if v in sel_v or ville_ok(v)],
+            departements if not (sel_v or sel_r) else [d for d in departements if d in sel_d or dept_ok(d)],
+            regions if not (sel_v or sel_d) else [r for r in regions if r in sel_r or region_ok(r)],
+        )
+        with self._lock:
+            if len(self._memo) >= NARROW_MEMO_SIZE:
+                self._memo.clear()
+            self._memo[key] = (lists, result)
+        return result
+
+    def format_func(self, param: str):
+        """`format_func` de multiselect affichant le nombre d'offres, si connu."""
+        counts = self.counts.get(param)
+        if not counts:
+            return str
+        return lambda v: f"{v} ({counts[v]})" if v in counts else str(v)
+
+
+def _from_vocabulary_rows(ville_rows, dept_rows):
+    ville_depts, dept_region = defaultdict(set), {}
+    for row in ville_rows or ():
+        if isinstance(row, (list, tuple)) and len(row) >= 2 and row[1]:
+            ville_depts[row[0]].add(row[1])
+            if len(row) >= 3 and row[2]:
+                dept_region.setdefault(row[1], row[2])
+    for row in dept_rows or ():
+        if isinstance(row, (list, tuple)) and len(row) >= 2 and row[1]:
+            dept_region[row[0]] = row[1]
+    return ville_depts, dept_region
+
+
+def _from_snapshot(snapshot, ville_depts, dept_region):
+    import numpy as np
+
+    df = snapshot.df
+    if {"VILLE", "DEPARTEMENT"} <= set(df.columns):
+        for ville, dept in df[["VILLE", "DEPARTEMENT"]].dropna().drop_duplicates().itertuples(index=False):
+            ville_depts[ville].add(dept)
+    if {"DEPARTEMENT", "REGION"} <= set(df.columns):
+        for dept, region in df[["DEPARTEMENT", "REGION"]].dropna().drop_duplicates().itertuples(index=False):
+            dept_region.setdefault(dept, region)
+    return {
+        param: {value: int(np.unpackbits(bitmap).sum()) for value, bitmap in index.items()}
+        for param, index in snapshot.indexes.items()
+    }
+
+
+def _build(ville_rows, dept_rows, snapshot) -> GeoIndex:
+    ville_depts, dept_region = _from_vocabulary_rows(ville_rows, dept_rows)
+    counts = _from_snapshot(snapshot, ville_depts, dept_region) if snapshot is not None else {}
+    return GeoIndex(dict(ville_depts), dept_region, counts)
+
+
+_current = Derived(_build)
+
+
+def get_geo_index(api_base_url: str) -> GeoIndex:
+    """Index courant, reconstruit seulement quand les vocabulaires ou le snapshot changent."""
+    return _current.get(vocabulary_rows("villes"), vocabulary_rows("departements"), local_snapshot(api_base_url))
+
+
+def _store_selection(state_key, widget_key):
+    import streamlit as st
+    st.session_state[state_key] = st.session_state[widget_key]
+
+
+def dependent_multiselect(label, options, state_key, format_func=str, **kwargs):
+    """Multiselect dont les options changent au fil des sélections voisines.
+
+    La sélection vit dans `st.session_state[state_key]` ; la clé du widget
+    dépend des options pour qu'un changement d'options ne perde pas la
+    sélection, réappliquée via `default`.
+    """
+    import streamlit as st
+
+    available = set(options)
+    selected = [v for v in st.session_state.get(state_key, []) if v in available]
+    widget_key = f"{state_key}-{hash(tuple(options))}"
+    return st.multiselect(label, options, default=selected, key=widget_key, format_func=format_func,
+                          on_change=_store_selection, args=(state_key, widget_key), **kwargs)
@@ -0,0 +1,244 @@
+"""Moteur de recherche local optionnel (LOCAL_ENGINE=1).
+
+La table des offres est synchronisée périodiquement dans un snapshot local
+(Parquet si pyarrow est installé, pickle sinon) et indexée en mémoire : un
+bitmap compressé (numpy.packbits) par valeur de ville, département, région,
+contrat et compétence, plus la colonne de dates de publication. Une recherche
+multi-filtres devient un OU des bitmaps d'un même filtre puis un ET entre
+filtres ; `total_count` et la pagination sont calculés dans le process.
+
+La synchronisation est incrémentale : tant que le snapshot a moins de 7 jours,
+seules les offres publiées depuis la dernière synchro sont redemandées
+(`date_filter` du backend) ; une synchro complète est refaite chaque jour
+pour oublier les offres retirées. Tant qu'aucun snapshot n'est prêt, ou pour
+un filtre que le snapshot ne sait pas traiter, la recherche part au backend.
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import api_client
+import tracing
+from core.config import LOCAL_ENGINE
+from derived import next_version
+from skills import parse_skills
+
+SNAPSHOT_PATH = os.getenv("OFFERS_SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "offers"))
+SNAPSHOT_SYNC_SECONDS = float(os.getenv("SNAPSHOT_SYNC_SECONDS", 15 * 60))
+SNAPSHOT_FULL_SYNC_SECONDS = float(os.getenv("SNAPSHOT_FULL_SYNC_SECONDS", 24 * 3600))
+SNAPSHOT_PAGE_SIZE = int(os.getenv("SNAPSHOT_PAGE_SIZE", 500))
+SNAPSHOT_TIMEOUT = (5, 120)     # (connexion, lecture) : grosses pages, backend parfois froid
+DATE_COLUMN = os.getenv("OFFERS_DATE_COLUMN", "DATE_PUBLICATION")
+
+# paramètre de /search -> colonne de l'offre
+FILTER_COLUMNS = {
+    "ville": "VILLE",
+    "departement": "DEPARTEMENT",
+    "region": "REGION",
+    "contrat": "TYPE_CONTRAT",
+}
+DATE_FILTERS = {"last_24h": 1, "last_3_days": 3, "last_7_days": 7}
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    return np.packbits(mask, bitorder="little")
+
+
+class OfferSnapshot:
+    """Offres triées par date décroissante et leurs index inversés."""
+
+    def __init__(self, df: pd.DataFrame):
+        if DATE_COLUMN in df.columns:
+            dates = pd.to_datetime(df[DATE_COLUMN], errors="coerce", utc=True).dt.tz_convert(None)
+            order = np.argsort(dates.fillna(pd.Timestamp(0)).values, kind="stable")[::-1]
+            df = df.iloc[order].reset_index(drop=True)
+            self.dates = dates.values[order]
+        else:
+            self.dates = None
+        self.df = df
+        self.size = len(df)
+        self.version = next_version()
+        self.indexes = {}
+        with tracing.span("snapshot_index"):
+            for param, column in FILTER_COLUMNS.items():
+                if column in df.columns:
+                    self.indexes[param] = self._value_index(df[column].to_numpy())
+            if "SKILLS" in df.columns:
+                self.indexes["skill"] = self._skill_index(df["SKILLS"])
+
+    def _value_index(self, values) -> dict:
+        codes, uniques = pd.factorize(values)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        index = {}
+        for k, value in enumerate(uniques):
+            mask = np.zeros(self.size, dtype=bool)
+            mask[order[bounds[k]:bounds[k + 1]]] = True
+            index[value] = _pack(mask)
+        return index
+
+    def _skill_index(self, raw_skills) -> dict:
+        rows = {}
+        for i, raw in enumerate(raw_skills):
+            for skill in parse_skills(raw):
+                rows.setdefault(skill, []).append(i)
+        index = {}
+        for skill, idx in rows.items():
+            mask = np.zeros(self.size, dtype=bool)
+            mask[idx] = True
+            index[skill] = _pack(mask)
+        return index
+
+    def search(self, params):
+        """Même réponse que /search, ou None si un filtre n'est pas indexé."""
+        grouped = {}
+        for key, value in params:
+            grouped.setdefault(key, []).append(value)
+        limit = int(grouped.pop("limit", [20])[0])
+        offset = int(grouped.pop("offset", [0])[0])
+
+        with tracing.span("local_search"):
+            result = None
+            for key, values in grouped.items():
+                if key == "date_filter":
+                    days = DATE_FILTERS.get(values[0])
+                    if days is None or self.dates is None:
+                        return None
+                    since = np.datetime64(pd.Timestamp.now(tz="UTC").tz_localize(None) - pd.Timedelta(days=days))
+                    bitmap = _pack(self.dates >= since)
+                else:
+                    index = self.indexes.get(key)
+                    if index is None:
+                        return None
+                    bitmap = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+                    for value in values:
+                        hit = index.get(value)
+                        if hit is not None:
+                            bitmap |= hit
+                result = bitmap if result is None else result & bitmap
+
+            if result is None:
+                rows = np.arange(self.size)
+            else:
+                rows = np.flatnonzero(np.unpackbits(result, count=self.size, bitorder="little"))
+            page = self.df.iloc[rows[offset:offset + limit]]
+            page = page.astype(object).where(page.notna(), None)
+            return {"data": page.to_dict("records"), "total_count": int(len(rows))}
+
+
+class LocalEngine:
+    """Snapshot persistant, synchronisé en arrière-plan."""
+
+    def __init__(self, api_base_url: str, path: str = SNAPSHOT_PATH):
+        self.api_base_url = api_base_url
+        self.path = path
+        self.snapshot = None
+        self.meta = {"last_sync": 0.0, "last_full_sync": 0.0}
+        self._df = None
+        self._thread = None
+
+    def start(self):
+        self._load()
+        self._thread = threading.Thread(target=self._run, name="local-engine-sync", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            if time.time() - self.meta["last_sync"] >= SNAPSHOT_SYNC_SECONDS:
+                try:
+                    self.sync()
+                except Exception as e:
+                    # on garde le snapshot courant, nouvel essai au prochain tour
+                    print(f"[local_engine] synchro en échec : {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+            time.sleep(min(SNAPSHOT_SYNC_SECONDS, 60))
+
+    def sync(self):
+        now = time.time()
+        age_days = (now - self.meta["last_sync"]) / 86400
+        full = self._df is None or now - self.meta["last_full_sync"] >= SNAPSHOT_FULL_SYNC_SECONDS
+        date_filter = None
+        if not full:
+            date_filter = next((f for f, days in sorted(DATE_FILTERS.items(), key=lambda kv: kv[1])
+                                if age_days < days), None)
+            full = date_filter is None
+
+        with tracing.span("snapshot_sync"):
+            rows = self._fetch_offers(None if full else date_filter)
+            df = pd.DataFrame(rows)
+            if not full:
+                id_column = "ID" if "ID" in df.columns else "SOURCE_URL"
+                df = pd.concat([df, self._df], ignore_index=True)
+                if id_column in df.columns:
+                    df = df.drop_duplicates(subset=id_column, keep="first")
+            snapshot = OfferSnapshot(df)
+
+        self._df = snapshot.df
+        self.snapshot = snapshot
+        self.meta["last_sync"] = now
+        if full:
+            self.meta["last_full_sync"] = now
+        self._save()
+
+    def _fetch_offers(self, date_filter=None) -> list:
+        url = f"{self.api_base_url}/search"
+        base = [("date_filter", date_filter)] if date_filter else []
+        first = api_client.get_json(url, params=base + [("limit", SNAPSHOT_PAGE_SIZE), ("offset", 0)],
+                                    timeout=SNAPSHOT_TIMEOUT)
+        rows = list(first.get("data", []))
+        total = first.get("total_count", len(rows))
+        futures = [
+            api_client.submit(api_client.get_json, url,
+                              params=base + [("limit", SNAPSHOT_PAGE_SIZE), ("offset", offset)],
+                              timeout=SNAPSHOT_TIMEOUT)
+            for offset in range(SNAPSHOT_PAGE_SIZE, total, SNAPSHOT_PAGE_SIZE)
+        ]
+        for future in futures:
+            rows.extend(future.result().get("data", []))
+        return rows
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            self._df.to_parquet(self.path + ".parquet.tmp", index=False)
+            os.replace(self.path + ".parquet.tmp", self.path + ".parquet")
+        except ImportError:
+            self._df.to_pickle(self.path + ".pkl.tmp")
+            os.replace(self.path + ".pkl.tmp", self.path + ".pkl")
+        with open(self.path + ".meta.json", "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+
+    def _load(self):
+        try:
+            with open(self.path + ".meta.json", encoding="utf-8") as f:
+                meta = json.load(f)
+            if os.path.exists(self.path + ".parquet"):
+                df = pd.read_parquet(self.path + ".parquet")
+            else:
+                df = pd.read_pickle(self.path + ".pkl")
+        except Exception:
+            return
+        self.meta.update(meta)
+        self._df = df
+        self.snapshot = OfferSnapshot(df)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine(api_base_url: str):
+    """Moteur local prêt à répondre, ou None (mode désactivé ou snapshot pas encore prêt)."""
+    global _engine
+    if not LOCAL_ENGINE:
+        return None
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = LocalEngine(api_base_url).start()
+    return _engine if _engine.snapshot is not None else None
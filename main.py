@@ -1,17 +1,14 @@
-import streamlit as st
-import requests
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from dotenv import load_dotenv
 import os, base64
-import streamlit.components.v1 as components
-from streamlit_js_eval import streamlit_js_eval, get_geolocation
-from streamlit_mermaid import st_mermaid
-from ast import literal_eval
-from PIL import Image
 
-load_dotenv()
+import streamlit as st
+
+from core.config import API_BASE_URL, PAGE_SIZE  # en premier : charge le .env
+from core import search, ui
+import api_client
+import tracing
+from geo_index import dependent_multiselect
+from offer_render import render_offers_html
+from skill_search import get_skill_index, skill_picker
 
 # Configuration de la page
 st.set_page_config(
@@ -21,10 +18,34 @@ st.set_page_config(
 )
 
 # Variables globales
-API_BASE_URL = "https://back-end-render-dg5f.onrender.com"
-
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOGO_DIR = os.path.join(BASE_DIR, "logos")  # <— plus de dépendance au cwd
+ML_DIR = os.path.join(BASE_DIR, "ML")
+
+# (titre, description, image, légende) des sections de la page ML
+ML_SECTIONS = [
+    ("Aperçu du dataset",
+     "Le jeu de données contient 10 000 observations et 14 colonnes, incluant les températures, vitesse de rotation, couple, usure outil et type de panne.",
+     "dataset.png", "Aperçu des premières lignes du dataset"),
+    ("Pairplot des variables numériques",
+     "Le pairplot permet de visualiser les relations croisées entre variables, avec une coloration par rapport au target (panne ou non).",
+     "pairplot.png", "Relations croisées entre variables et target"),
+    ("Distribution du couple et de la vitesse en fonction du target",
+     "Ces graphiques en violon montrent la distribution du couple (Torque) et de la vitesse de rotation (Rotational Speed) "
+     "par rapport à la variable cible (Target : panne ou non). On observe une variabilité plus importante en cas de panne.",
+     "distribution_target.png", "Distribution torque et vitesse de rotation"),
+    ("Relation entre vitesse et couple",
+     "Ce scatterplot met en évidence les différents types de pannes en fonction du couple et de la vitesse de rotation. "
+     "On distingue des zones spécifiques associées à certains types de défaillances.",
+     "scatterplot.png", "Couple vs vitesse de rotation selon le type de panne"),
+    ("Matrice de corrélation",
+     "La heatmap révèle une forte corrélation négative entre le couple et la vitesse de rotation (-0.88), "
+     "et une corrélation positive entre température de l'air et température du process (0.88).",
+     "heatmap.png", "Matrice de corrélation des variables"),
+    ("Résultats des modèles de classification",
+     "Les matrices de confusion comparent les modèles (Balanced Random Forest, Bagging, RUS Boost, Easy Ensemble). ",
+     "Conclusion.png", "Comparaison des modèles via matrices de confusion et scores"),
+]
 
 # CSS
 st.markdown("""
@@ -57,6 +78,11 @@ st.markdown("""
         box-shadow: 0 2px 8px rgba(0,0,0,0.1);
         margin: 0.5rem 0;
     }
+    .offer-grid {
+        display: grid;
+        grid-template-columns: minmax(0, 1fr);
+        gap: 0.5rem;
+    }
 </style>
 """, unsafe_allow_html=True)
 
@@ -71,17 +97,6 @@ def _data_uri(path: str) -> str:
         b64 = base64.b64encode(f.read()).decode("utf-8")
     return f"data:{mime};base64,{b64}"
 
-def safe_list(x):
-    if isinstance(x, list):
-        return x
-    if isinstance(x, str):
-        try:
-            v = literal_eval(x)
-            return v if isinstance(v, list) else []
-        except Exception:
-            return []
-    return []
-
 # ---------- Pages
 def main():
     # En-tête
@@ -96,11 +111,13 @@ def main():
     st.sidebar.title("Navigation")
     page = st.sidebar.radio(
         "Choisissez une page :",
-        ["🗺️ Stack Technique (Logos)", "🧮 DataViz", "👤 Espace Candidat","🧮 Autres"]
+        ["🗺️ Stack Technique (Logos)", "🧮 DataViz", "👤 Espace Candidat", "📍 Carte", "🧮 Autres"]
     )
 
     if page == "👤 Espace Candidat":
         show_candidate_profile()
+    elif page == "📍 Carte":
+        show_map()
     elif page == "🧮 DataViz":
         show_projet2()
     elif page == "🗺️ Stack Technique (Logos)":
@@ -112,183 +129,128 @@ def show_candidate_profile():
     """Page de profil candidat avec filtres et pagination"""
     st.title("Filtres géographiques")
 
-    if st.session_state.get("scroll_to_top", False):
-        streamlit_js_eval(js_expressions=["window.scrollTo(0, 0)"])
-        st.session_state.scroll_to_top = False
-
-    # Pagination
-    if "page" not in st.session_state:
-        st.session_state.page = 0
-    limit = 20
-    offset = st.session_state.page * limit
-
-    # Dropdown data
-    try:
-        villes = [v[0] for v in requests.get(f"{API_BASE_URL}/candidat/ville", timeout=20).json()["data"]]
-        departements = [d[0] for d in requests.get(f"{API_BASE_URL}/candidat/departement", timeout=20).json()["data"]]
-        regions = [r[0] for r in requests.get(f"{API_BASE_URL}/candidat/region", timeout=20).json()["data"]]
-        skills = [s["skill"] for s in requests.get(f"{API_BASE_URL}/skills/", timeout=20).json()]
-        contrats = [c[0] for c in requests.get(f"{API_BASE_URL}/candidat/contrat", timeout=20).json()["data"]]
-    except Exception as e:
-        st.error(f"Erreur lors du chargement des données : {str(e)}")
-        return
-
-    # Filtres UI
+    # Listes des filtres ; les listes géographiques sont restreintes côté
+    # client aux valeurs compatibles entre elles, sans appel API
+    vocab, geo = search.filter_options()
+    villes, departements, regions = vocab["villes"], vocab["departements"], vocab["regions"]
+    skills, contrats = vocab["skills"], vocab["contrats"]
+
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("🏙️ Villes")
-        selected_villes = st.multiselect("Sélectionnez des villes", villes)
+        selected_villes = dependent_multiselect("Sélectionnez des villes", villes, "geo_villes",
+                                                geo.format_func("ville"))
 
         st.subheader("🏞️ Départements")
-        selected_departements = st.multiselect("Sélectionnez des départements", departements)
+        selected_departements = dependent_multiselect("Sélectionnez des départements", departements,
+                                                      "geo_departements", geo.format_func("departement"))
 
         st.subheader("🌍 Régions")
-        selected_regions = st.multiselect("Sélectionnez des régions", regions)
+        selected_regions = dependent_multiselect("Sélectionnez des régions", regions, "geo_regions",
+                                                 geo.format_func("region"))
+
+        # Villes proches de la position du navigateur, sans appel de géocodage
+        nearby_villes = search.near_me()
 
     with col2:
+        # Seules les meilleures correspondances du texte saisi sont envoyées au navigateur
         st.subheader("🧠 Skills")
-        selected_skills = st.multiselect("Sélectionnez des compétences", skills)
-
-        st.subheader("📋 Contrats")
-        selected_contrats = st.multiselect("Sélectionnez des contrats", contrats)
-
-        st.subheader("🕒 Date de publication")
-        date_options = {
-            "⏰ Dernières 24h": "last_24h",
-            "🗓️ 3 derniers jours": "last_3_days",
-            "📆 7 derniers jours": "last_7_days"
-        }
-        selected_date_label = st.selectbox("Filtrer par date", [""] + list(date_options.keys()))
+        selected_skills = skill_picker("Sélectionnez des compétences",
+                                       get_skill_index(skills, geo.counts.get("skill")), "skills",
+                                       geo.format_func("skill"))
+
+        # Autres filtres : rien n'est envoyé au backend avant la validation du formulaire
+        with st.form("filtres"):
+            st.subheader("📋 Contrats")
+            selected_contrats = st.multiselect("Sélectionnez des contrats", contrats,
+                                               format_func=geo.format_func("contrat"))
+
+            st.subheader("🕒 Date de publication")
+            date_options = {
+                "⏰ Dernières 24h": "last_24h",
+                "🗓️ 3 derniers jours": "last_3_days",
+                "📆 7 derniers jours": "last_7_days"
+            }
+            selected_date_label = st.selectbox("Filtrer par date", [""] + list(date_options.keys()))
+
+            submitted = st.form_submit_button("🔍 Rechercher", type="primary")
 
     # Rechercher
-    if st.button("🔍 Rechercher", type="primary"):
-        st.session_state.page = 0  # reset à la première page
-
-    # Params
-    params = []
-    for v in selected_villes: params.append(("ville", v))
-    for d in selected_departements: params.append(("departement", d))
-    for r in selected_regions: params.append(("region", r))
-    for s in selected_skills: params.append(("skill", s))
-    for c in selected_contrats: params.append(("contrat", c))
-    if selected_date_label:
-        params.append(("date_filter", date_options[selected_date_label]))
-    params.append(("limit", limit))
-    params.append(("offset", offset))
-
-    # API call
-    try:
-        response = requests.get(f"{API_BASE_URL}/search", params=params, timeout=60)
-        if response.status_code == 200:
-            data = response.json()
-            offres = data.get("data", [])
-            total_count = data.get("total_count", 0)
-            total_pages = max((total_count + limit - 1) // limit, 1)
+    if submitted:
+        search.submit_search(selected_villes, selected_departements, selected_regions,
+                             selected_skills, selected_contrats, date_options.get(selected_date_label),
+                             nearby_villes)
+
+    col_results, col_stats = st.columns([3, 1])
+    with col_results:
+        show_results(PAGE_SIZE)
+    with col_stats:
+        st.subheader("📈 Compétences")
+        search.skill_analytics(PAGE_SIZE)
+
+
+@st.fragment
+def show_results(limit):
+    """Résultats et pagination : changer de page ne réexécute que ce fragment."""
+    with tracing.rerun_trace("main:résultats"):
+        ui.scroll_to_top_if_requested()
+        try:
+            offres, total_count, total_pages = search.fetch_results(limit)
 
             if not offres:
                 st.warning("Aucune offre trouvée.")
             else:
                 st.subheader(f"📊 {total_count} offres trouvées – Page {st.session_state.page + 1} / {total_pages}")
 
-                for i, offre in enumerate(offres, 1):
-                    skills_list = safe_list(offre.get('SKILLS', '[]'))
-                    with st.container():
-                        st.markdown(f"""
-                            <div class="metric-card">
-                                <h4>{offre.get('TITLE', 'Titre non disponible')}</h4>
-                                <p><strong>📍 Lieu:</strong> {offre.get('VILLE', 'Non spécifié')} ({offre.get('REGION', 'Région non spécifiée')})</p>
-                                <p><strong>💼 Contrat:</strong> {offre.get('TYPE_CONTRAT', 'Non spécifié')}</p>
-                                <p><strong>🛠️ Compétences:</strong> {', '.join(skills_list[:10])}</p>
-                                <p><strong>🔗 Lien:</strong> <a href="{offre.get('SOURCE_URL', '#')}" target="_blank">Voir l'offre</a></p>
-                            </div>
-                        """, unsafe_allow_html=True)
+                st.markdown(render_offers_html(offres, layout="metric"), unsafe_allow_html=True)
 
                 # Pagination
                 col_prev, col_page, col_next = st.columns(3)
                 with col_prev:
-                    if st.button("⬅️ Page précédente") and st.session_state.page > 0:
-                        st.session_state.page -= 1
-                        st.session_state.scroll_to_top = True
-                        st.rerun()
+                    st.button("⬅️ Page précédente", on_click=ui.turn_page, args=(-1,),
+                              disabled=st.session_state.page == 0)
                 with col_page:
                     st.markdown(f"<div style='text-align:center;font-weight:bold;'>📄 Page {st.session_state.page + 1} sur {total_pages}</div>", unsafe_allow_html=True)
                 with col_next:
-                    if st.button("➡️ Page suivante") and (st.session_state.page + 1) < total_pages:
-                        st.session_state.page += 1
-                        st.session_state.scroll_to_top = True
-                        st.rerun()
-        else:
-            st.error(f"Erreur API: {response.status_code}")
-    except Exception as e:
-        st.error(f"❌ Erreur lors de la recherche : {str(e)}")
+                    st.button("➡️ Page suivante", on_click=ui.turn_page, args=(+1,),
+                              disabled=(st.session_state.page + 1) >= total_pages)
+
+                search.export_results(limit, total_count)
+        except api_client.ApiError as e:
+            st.error(f"Erreur API: {e.status_code}")
+        except Exception as e:
+            st.error(f"❌ Erreur lors de la recherche : {str(e)}")
+
+def show_map():
+    from map_view import map_page  # plotly : chargé seulement pour cette page
+    map_page(API_BASE_URL)
 
 def show_projet2():
     st.title("📊 DataViz - Marché de la Data 2025")
     st.markdown("Voici mon dashboard interactif Power BI intégré :")
     st.info("🔍 Pour profiter pleinement du dashboard, cliquez sur l’icône plein écran en bas à droite de la visualisation.")
 
-    powerbi_iframe = """
-    <iframe title="Back-to-Basic" width="800" height="600" 
-    src="https://app.powerbi.com/view?r=eyJrIjoiNjBlN2EwOTctYzlhZS00NWVjLTk2N2ItZjY3NjY4MTk4ODdkIiwidCI6IjFjODA3N2YwLTY5MDItNDc1NC1hYzE4LTA4Zjc4ZjhlOTUxZSJ9" 
-    frameborder="0" allowFullScreen="true"></iframe>
-    """
-    components.html(powerbi_iframe, height=1020, width=1020)
+    ui.powerbi_iframe("https://app.powerbi.com/view?r=eyJrIjoiNjBlN2EwOTctYzlhZS00NWVjLTk2N2ItZjY3NjY4MTk4ODdkIiwidCI6IjFjODA3N2YwLTY5MDItNDc1NC1hYzE4LTA4Zjc4ZjhlOTUxZSJ9",
+                      800, 600, 1020, 1020)
 
 def show_projet3():
     st.title("📊 DataViz - Drug Sales Report")
     st.markdown("Voici mon dashboard interactif Power BI intégré :")
     st.info("🔍 Pour profiter pleinement du dashboard, cliquez sur l’icône plein écran en bas à droite de la visualisation.")
 
-    powerbi_iframe = """
-    <iframe title="Back-to-Basic" width="800" height="600" 
-    src="https://app.powerbi.com/view?r=eyJrIjoiNjRkNjQ1ZjgtOWFjZS00ODhiLTg2MzktNmE5ZmJlYzdhMmFkIiwidCI6IjFjODA3N2YwLTY5MDItNDc1NC1hYzE4LTA4Zjc4ZjhlOTUxZSJ9" 
-    frameborder="0" allowFullScreen="true"></iframe>
-    """
-    components.html(powerbi_iframe, height=1020, width=1020)
+    ui.powerbi_iframe("https://app.powerbi.com/view?r=eyJrIjoiNjRkNjQ1ZjgtOWFjZS00ODhiLTg2MzktNmE5ZmJlYzdhMmFkIiwidCI6IjFjODA3N2YwLTY5MDItNDc1NC1hYzE4LTA4Zjc4ZjhlOTUxZSJ9",
+                      800, 600, 1020, 1020)
 
     st.title("📊 ML - predictive Maintenance Classification")
 
-    # --- Image 2 : Dataset ---
-    st.header("Aperçu du dataset")
-    st.write("Le jeu de données contient 10 000 observations et 14 colonnes, incluant les températures, vitesse de rotation, couple, usure outil et type de panne.")
-    img2 = Image.open("ML/dataset.png")
-    st.image(img2, caption="Aperçu des premières lignes du dataset", use_container_width=True)
-
-    # --- Image 5 : Pairplot ---
-    st.header("Pairplot des variables numériques")
-    st.write("Le pairplot permet de visualiser les relations croisées entre variables, avec une coloration par rapport au target (panne ou non).")
-    img5 = Image.open("ML/pairplot.png")
-    st.image(img5, caption="Relations croisées entre variables et target", use_column_width=True)
-
-        # --- Image 1 : Distribution target ---
-    st.header("Distribution du couple et de la vitesse en fonction du target")
-    st.write("Ces graphiques en violon montrent la distribution du couple (Torque) et de la vitesse de rotation (Rotational Speed) "
-            "par rapport à la variable cible (Target : panne ou non). On observe une variabilité plus importante en cas de panne.")
-    img1 = Image.open("ML/distribution_target.png")
-    st.image(img1, caption="Distribution torque et vitesse de rotation", use_container_width=True)
-
-
-    # --- Image 4 : Scatterplot ---
-    st.header("Relation entre vitesse et couple")
-    st.write("Ce scatterplot met en évidence les différents types de pannes en fonction du couple et de la vitesse de rotation. "
-            "On distingue des zones spécifiques associées à certains types de défaillances.")
-    img4 = Image.open("ML/scatterplot.png")
-    st.image(img4, caption="Couple vs vitesse de rotation selon le type de panne", use_column_width=True)
-
-    # --- Image 6 : Heatmap ---
-    st.header("Matrice de corrélation")
-    st.write("La heatmap révèle une forte corrélation négative entre le couple et la vitesse de rotation (-0.88), "
-            "et une corrélation positive entre température de l'air et température du process (0.88).")
-    img6 = Image.open("ML/heatmap.png")
-    st.image(img6, caption="Matrice de corrélation des variables", use_column_width=True)
-
-    # --- Image 3 : Modèles et confusion matrix ---
-    st.header("Résultats des modèles de classification")
-    st.write("Les matrices de confusion comparent les modèles (Balanced Random Forest, Bagging, RUS Boost, Easy Ensemble). ")
-    img3 = Image.open("ML/Conclusion.png")
-    st.image(img3, caption="Comparaison des modèles via matrices de confusion et scores", use_column_width=True)
-
-    
+    # Une seule section affichée à la fois : seules ses images partent vers le navigateur
+    titles = [section[0] for section in ML_SECTIONS]
+    selected = st.radio("Section", titles, horizontal=True, label_visibility="collapsed")
+    title, text, filename, caption = ML_SECTIONS[titles.index(selected)]
+    st.header(title)
+    st.write(text)
+    from assets import image_variant  # Pillow : chargé seulement pour cette page
+    st.image(image_variant(os.path.join(ML_DIR, filename)), caption=caption, use_container_width=True)
 
 
 def show_stack_logos():
@@ -341,7 +303,8 @@ def show_stack_logos():
 
     st.title("Mon Modèle Conceptuel de Données")
 
-    st.components.v1.iframe(
+    import streamlit.components.v1 as components
+    components.iframe(
     "https://dbdiagram.io/d/Projet-Ilan-685be325f413ba3508d125e8", 
     width=1200, 
     height=800, 
@@ -349,4 +312,6 @@ def show_stack_logos():
 
 # Run
 if __name__ == "__main__":
-    main()
+    with tracing.rerun_trace("main"):
+        main()
+        tracing.debug_panel()
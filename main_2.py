@@ -1,15 +1,12 @@
 import streamlit as st
-import requests
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from dotenv import load_dotenv
-import os
-import streamlit.components.v1 as components
-from streamlit_js_eval import streamlit_js_eval, get_geolocation
-from ast import literal_eval
 
-load_dotenv()
+from core.config import API_BASE_URL, PAGE_SIZE  # first: loads .env before the other modules read it
+from core import search, ui
+import api_client
+import tracing
+from geo_index import dependent_multiselect
+from offer_render import render_offers_html
+from skill_search import get_skill_index, skill_picker
 
 # --- Page config
 st.set_page_config(
@@ -19,8 +16,6 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-API_BASE_URL = "https://back-end-render-dg5f.onrender.com"
-
 # --- Global CSS (sobre & épuré)
 st.markdown("""
 <style>
@@ -68,6 +63,12 @@ html, body, [data-testid="stAppViewContainer"]{
 .job-meta{
   display:flex; flex-wrap:wrap; gap:10px; font-size: 0.93rem; color: var(--muted);
 }
+.offer-grid{
+  display:grid; grid-template-columns: repeat(2, minmax(0, 1fr)); gap: 10px 2rem;
+}
+@media (max-width: 800px){
+  .offer-grid{ grid-template-columns: minmax(0, 1fr); }
+}
 .badges{ display:flex; flex-wrap:wrap; gap:8px; margin-top:8px; }
 .badge{
   background: var(--badge);
@@ -101,174 +102,142 @@ a.clean:hover{ text-decoration: underline; }
 </style>
 """, unsafe_allow_html=True)
 
-# --- Header
-st.markdown("""
-<div class="main-header">
-  <h1>💼 Job Market Dashboard</h1>
-  <p>Filtre, explore, clique. Le reste est du bruit.</p>
-</div>
-""", unsafe_allow_html=True)
-
-# --- Sidebar (plus lisible)
-st.sidebar.title("🧭 Navigation")
-page = st.sidebar.selectbox("Choisis une page", ["👤 Profile", "📊 Power BI"])
-
-# ---------- Utilities
-def safe_list(x):
-    if isinstance(x, list): return x
-    if isinstance(x, str):
-        try:
-            v = literal_eval(x)
-            return v if isinstance(v, list) else []
-        except Exception:
-            return []
-    return []
-
-def render_offer(offre: dict):
-    title = offre.get("TITLE") or "Titre non disponible"
-    ville = offre.get("VILLE") or "Non spécifié"
-    region = offre.get("REGION") or "Région non spécifiée"
-    contrat = offre.get("TYPE_CONTRAT") or "Non spécifié"
-    url = offre.get("SOURCE_URL") or "#"
-    skills = safe_list(offre.get("SKILLS", "[]"))
-
-    st.markdown(f"""
-    <div class="job-card">
-        <h4>🎯 {title}</h4>
-        <div class="job-meta">
-            <div>📍 {ville} — {region}</div>
-            <div>💼 {contrat}</div>
-            <div>🔗 <a class="clean" href="{url}" target="_blank">Voir l'offre</a></div>
-        </div>
-        <div class="badges">
-            {''.join([f'<span class="badge">{s}</span>' for s in skills[:10]])}
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-
 # ---------- Pages
 def show_candidate_profile():
     st.subheader("🎯 Filtres")
-    if st.session_state.get("scroll_to_top", False):
-        streamlit_js_eval(js_expressions=["window.scrollTo(0, 0)"])
-        st.session_state.scroll_to_top = False
 
-    if "page" not in st.session_state:
-        st.session_state.page = 0
-    limit = 20
-    offset = st.session_state.page * limit
+    # Fetch filters (geography lists already narrowed to the current selections)
+    vocab, geo = search.filter_options()
+    villes, departements, regions = vocab["villes"], vocab["departements"], vocab["regions"]
+    skills, contrats = vocab["skills"], vocab["contrats"]
 
-    # Fetch filters
-    try:
-        villes = [v[0] for v in requests.get(f"{API_BASE_URL}/candidat/ville", timeout=20).json()["data"]]
-        departements = [d[0] for d in requests.get(f"{API_BASE_URL}/candidat/departement", timeout=20).json()["data"]]
-        regions = [r[0] for r in requests.get(f"{API_BASE_URL}/candidat/region", timeout=20).json()["data"]]
-        skills = [s["skill"] for s in requests.get(f"{API_BASE_URL}/skills/", timeout=20).json()]
-        contrats = [c[0] for c in requests.get(f"{API_BASE_URL}/candidat/contrat", timeout=20).json()["data"]]
-    except Exception as e:
-        st.error(f"Erreur lors du chargement des données : {e}")
-        return
-
-    # Filters layout
-    c1, c2, c3 = st.columns([1,1,1])
-    with c1:
+    # Geography filters sit outside the form: each level is narrowed client-side
+    # to the values compatible with the other two, without any API call
+    g1, g2, g3 = st.columns([1,1,1])
+    with g1:
         st.markdown("<div class='section-title'>🏙️ Villes</div>", unsafe_allow_html=True)
-        selected_villes = st.multiselect(" ", villes, label_visibility="collapsed")
-
+        selected_villes = dependent_multiselect(" ", villes, "geo_villes", geo.format_func("ville"),
+                                                label_visibility="collapsed")
+    with g2:
         st.markdown("<div class='section-title'>🏞️ Départements</div>", unsafe_allow_html=True)
-        selected_departements = st.multiselect("  ", departements, label_visibility="collapsed")
-
-    with c2:
+        selected_departements = dependent_multiselect("  ", departements, "geo_departements",
+                                                      geo.format_func("departement"), label_visibility="collapsed")
+    with g3:
         st.markdown("<div class='section-title'>🌍 Régions</div>", unsafe_allow_html=True)
-        selected_regions = st.multiselect("   ", regions, label_visibility="collapsed")
-
-        st.markdown("<div class='section-title'>🧠 Compétences</div>", unsafe_allow_html=True)
-        selected_skills = st.multiselect("    ", skills, label_visibility="collapsed")
-
-    with c3:
-        st.markdown("<div class='section-title'>📋 Contrats</div>", unsafe_allow_html=True)
-        selected_contrats = st.multiselect("     ", contrats, label_visibility="collapsed")
-
-        st.markdown("<div class='section-title'>🕒 Date de publication</div>", unsafe_allow_html=True)
-        date_options = {
-            "⏰ 24 dernières heures": "last_24h",
-            "🗓️ 3 derniers jours": "last_3_days",
-            "📆 7 derniers jours": "last_7_days",
-        }
-        selected_date_label = st.selectbox("      ", [""] + list(date_options.keys()), label_visibility="collapsed")
-
-    search = st.button("🔍 Rechercher", type="primary")
-    if search:
-        st.session_state.page = 0
-
-    # Build params
-    params = []
-    for v in selected_villes: params.append(("ville", v))
-    for d in selected_departements: params.append(("departement", d))
-    for r in selected_regions: params.append(("region", r))
-    for s in selected_skills: params.append(("skill", s))
-    for c in selected_contrats: params.append(("contrat", c))
-    if selected_date_label:
-        params.append(("date_filter", date_options[selected_date_label]))
-    params += [("limit", limit), ("offset", offset)]
-
-    # Query
-    try:
-        response = requests.get(f"{API_BASE_URL}/search", params=params, timeout=60)
-        if response.status_code != 200:
-            st.error(f"Erreur API: {response.status_code}")
-            return
-        data = response.json()
-        offres = data.get("data", [])
-        total_count = data.get("total_count", 0)
-        total_pages = max((total_count + limit - 1) // limit, 1)
-
-        st.markdown(f"**{total_count}** offres trouvées")
-        st.divider()
-
-        if not offres:
-            st.warning("Aucune offre trouvée avec ces filtres.")
-            return
-
-        # Grid-like rendering (2 columns)
-        colA, colB = st.columns(2, gap="large")
-        for idx, offre in enumerate(offres):
-            with (colA if idx % 2 == 0 else colB):
-                render_offer(offre)
-                st.markdown("<div style='height:10px'></div>", unsafe_allow_html=True)
-
-        # Pagination
-        st.markdown("<div class='pager'>", unsafe_allow_html=True)
-        col_prev, col_mid, col_next = st.columns([1,3,1])
-        with col_prev:
-            if st.button("⬅️ Précédent", use_container_width=True, disabled=(st.session_state.page == 0)):
-                st.session_state.page -= 1
-                st.session_state.scroll_to_top = True
-                st.rerun()
-        with col_mid:
-            st.markdown(f"<div class='info'>Page {st.session_state.page + 1} / {total_pages}</div>", unsafe_allow_html=True)
-        with col_next:
-            if st.button("Suivant ➡️", use_container_width=True, disabled=((st.session_state.page + 1) >= total_pages)):
-                st.session_state.page += 1
-                st.session_state.scroll_to_top = True
-                st.rerun()
-        st.markdown("</div>", unsafe_allow_html=True)
-
-    except Exception as e:
-        st.error(f"❌ Erreur lors de la recherche : {e}")
+        selected_regions = dependent_multiselect("   ", regions, "geo_regions", geo.format_func("region"),
+                                                 label_visibility="collapsed")
+
+    # "Near me": cities around the browser position, from a local spatial index (no geocoding call)
+    nearby_villes = search.near_me()
+
+    # Skills: only the top matches for the typed text are sent to the browser
+    st.markdown("<div class='section-title'>🧠 Compétences</div>", unsafe_allow_html=True)
+    selected_skills = skill_picker("    ", get_skill_index(skills, geo.counts.get("skill")), "skills",
+                                   geo.format_func("skill"), label_visibility="collapsed")
+
+    # Other filters (form: the backend is only queried on submit)
+    with st.form("filters", border=False):
+        c1, c2 = st.columns([1,1])
+        with c1:
+            st.markdown("<div class='section-title'>📋 Contrats</div>", unsafe_allow_html=True)
+            selected_contrats = st.multiselect("     ", contrats, format_func=geo.format_func("contrat"),
+                                               label_visibility="collapsed")
+
+        with c2:
+            st.markdown("<div class='section-title'>🕒 Date de publication</div>", unsafe_allow_html=True)
+            date_options = {
+                "⏰ 24 dernières heures": "last_24h",
+                "🗓️ 3 derniers jours": "last_3_days",
+                "📆 7 derniers jours": "last_7_days",
+            }
+            selected_date_label = st.selectbox("      ", [""] + list(date_options.keys()), label_visibility="collapsed")
+
+        submitted = st.form_submit_button("🔍 Rechercher", type="primary")
+
+    if submitted:
+        search.submit_search(selected_villes, selected_departements, selected_regions,
+                             selected_skills, selected_contrats, date_options.get(selected_date_label),
+                             nearby_villes)
+
+    col_results, col_stats = st.columns([3, 1])
+    with col_results:
+        show_results(PAGE_SIZE)
+    with col_stats:
+        st.markdown("<div class='section-title'>📈 Compétences</div>", unsafe_allow_html=True)
+        search.skill_analytics(PAGE_SIZE)
+
+
+@st.fragment
+def show_results(limit):
+    """Results and pager: turning a page only re-executes this fragment."""
+    with tracing.rerun_trace("👤 Profile:résultats"):
+        ui.scroll_to_top_if_requested()
+        try:
+            offres, total_count, total_pages = search.fetch_results(limit)
+
+            st.markdown(f"**{total_count}** offres trouvées")
+            st.divider()
+
+            if not offres:
+                st.warning("Aucune offre trouvée avec ces filtres.")
+                return
+
+            # Grid rendering (2 columns, CSS grid, one delta for the whole page)
+            st.markdown(render_offers_html(offres), unsafe_allow_html=True)
+
+            # Pagination (callbacks run before the fragment rerun, no st.rerun needed)
+            st.markdown("<div class='pager'>", unsafe_allow_html=True)
+            col_prev, col_mid, col_next = st.columns([1,3,1])
+            with col_prev:
+                st.button("⬅️ Précédent", use_container_width=True, on_click=ui.turn_page, args=(-1,),
+                          disabled=(st.session_state.page == 0))
+            with col_mid:
+                st.markdown(f"<div class='info'>Page {st.session_state.page + 1} / {total_pages}</div>", unsafe_allow_html=True)
+            with col_next:
+                st.button("Suivant ➡️", use_container_width=True, on_click=ui.turn_page, args=(+1,),
+                          disabled=((st.session_state.page + 1) >= total_pages))
+            st.markdown("</div>", unsafe_allow_html=True)
+
+            search.export_results(limit, total_count)
+
+        except api_client.ApiError as e:
+            st.error(f"Erreur API: {e.status_code}")
+        except Exception as e:
+            st.error(f"❌ Erreur lors de la recherche : {e}")
+
+def show_map():
+    from map_view import map_page  # plotly is only loaded for this page
+    map_page(API_BASE_URL)
 
 def show_projet2():
     st.subheader("📊 Dashboard Power BI")
     st.info("Astuce : clique sur l’icône plein écran en bas à droite de la viz.")
-    powerbi_iframe = """
-    <iframe title="Back-to-Basic" width="1100" height="720"
-    src="https://app.powerbi.com/view?r=eyJrIjoiNjRkNjQ1ZjgtOWFjZS00ODhiLTg2MzktNmE5ZmJlYzdhMmFkIiwidCI6IjFjODA3N2YwLTY5MDItNDc1NC1hYzE4LTA4Zjc4ZjhlOTUxZSJ9"
-    frameborder="0" allowFullScreen="true"></iframe>
-    """
-    components.html(powerbi_iframe, height=760, width=1100)
+    ui.powerbi_iframe("https://app.powerbi.com/view?r=eyJrIjoiNjRkNjQ1ZjgtOWFjZS00ODhiLTg2MzktNmE5ZmJlYzdhMmFkIiwidCI6IjFjODA3N2YwLTY5MDItNDc1NC1hYzE4LTA4Zjc4ZjhlOTUxZSJ9",
+                      1100, 720, 1100, 760)
 
 # --- Router
-if page == "👤 Profile":
-    show_candidate_profile()
-else:
-    show_projet2()
+def main():
+    # --- Header
+    st.markdown("""
+    <div class="main-header">
+      <h1>💼 Job Market Dashboard</h1>
+      <p>Filtre, explore, clique. Le reste est du bruit.</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # --- Sidebar (plus lisible)
+    st.sidebar.title("🧭 Navigation")
+    page = st.sidebar.selectbox("Choisis une page", ["👤 Profile", "📍 Carte", "📊 Power BI"])
+
+    with tracing.rerun_trace(page):
+        if page == "👤 Profile":
+            show_candidate_profile()
+        elif page == "📍 Carte":
+            show_map()
+        else:
+            show_projet2()
+        tracing.debug_panel()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Carte des offres par ville, département ou région, éventuellement pour une compétence.
+
+Les comptes par ville sont agrégés une fois puis partagés par le process :
+depuis le snapshot du moteur local s'il est actif (bitmaps), sinon par un
+parcours complet de /search (blocs en parallèle, comme l'export) gardé
+`MAP_TTL_SECONDS` et rafraîchi en arrière-plan. Départements et régions sont
+obtenus en regroupant les villes via le référentiel des communes, marqueur au
+barycentre des villes pondéré par le nombre d'offres ; au niveau ville,
+au-delà de `MAP_MAX_MARKERS` points, les villes sont regroupées par mailles de
+`MAP_GRID_DEGREES` degrés.
+
+Le parcours ne demande que les champs VILLE et SKILLS ; un seul parcours à la
+fois, les sessions arrivées pendant ce temps attendent son résultat.
+
+Le HTML de chaque figure (JSON plotly compris) est mis en cache par version de
+la source, niveau et compétence : changer de niveau ne refait ni
+l'agrégation ni la sérialisation.
+"""
+import os
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+import tracing
+from communes import get_communes
+from derived import RefreshingCache, next_version
+from export import iter_blocks
+from search_cache import local_snapshot
+from skills import parse_skills
+
+MAP_TTL_SECONDS = float(os.getenv("MAP_TTL_SECONDS", 6 * 3600))
+MAP_MAX_MARKERS = int(os.getenv("MAP_MAX_MARKERS", 1500))
+MAP_GRID_DEGREES = float(os.getenv("MAP_GRID_DEGREES", 0.2))
+MAP_FIGURE_CACHE_SIZE = 64
+MAP_SKILL_CHOICES = 200
+MAP_HEIGHT = 650
+
+LEVELS = {"ville": "🏙️ Villes", "departement": "🏞️ Départements", "region": "🌍 Régions"}
+
+
+class OfferGeoStats:
+    """Nombre d'offres par ville, au total et par compétence."""
+
+    def __init__(self):
+        self.villes = Counter()
+        self.skills = Counter()
+        self.by_skill = defaultdict(Counter)
+        self.version = next_version()
+
+    def add(self, rows):
+        for row in rows:
+            ville = row.get("VILLE")
+            if not ville:
+                continue
+            self.villes[ville] += 1
+            for skill in parse_skills(row.get("SKILLS")):
+                self.skills[skill] += 1
+                self.by_skill[skill][ville] += 1
+
+
+def _scan_offers(api_base_url):
+    stats = OfferGeoStats()
+    with tracing.span("map_aggregate"):
+        for rows, _ in iter_blocks(api_base_url, [], fields=("VILLE", "SKILLS")):
+            stats.add(rows)
+    return stats
+
+
+MAP_CACHE = RefreshingCache(MAP_TTL_SECONDS)
+
+
+def _source(api_base_url):
+    """Snapshot local s'il est prêt, sinon statistiques issues de /search."""
+    snapshot = local_snapshot(api_base_url)
+    if snapshot is not None and "ville" in snapshot.indexes:
+        return snapshot
+    return MAP_CACHE.get("offers", lambda: _scan_offers(api_base_url))
+
+
+def _ville_counts(source, skill=None) -> dict:
+    if isinstance(source, OfferGeoStats):
+        return source.by_skill.get(skill, {}) if skill else source.villes
+    import numpy as np
+
+    villes = source.indexes["ville"]
+    if not skill:
+        return {v: int(np.unpackbits(bm).sum()) for v, bm in villes.items()}
+    skill_bm = source.indexes.get("skill", {}).get(skill)
+    if skill_bm is None:
+        return {}
+    counts = {v: int(np.unpackbits(bm & skill_bm).sum()) for v, bm in villes.items()}
+    return {v: n for v, n in counts.items() if n}
+
+
+_choices = (None, None)     # (source, compétences proposées)
+
+
+def skill_choices(source) -> list:
+    """Compétences proposées pour la carte : les plus fréquentes."""
+    global _choices
+    if _choices[0] is source:
+        return _choices[1]
+    if isinstance(source, OfferGeoStats):
+        choices = [s for s, _ in source.skills.most_common(MAP_SKILL_CHOICES)]
+    else:
+        import numpy as np
+
+        counts = {s: int(np.unpackbits(bm).sum()) for s, bm in source.indexes.get("skill", {}).items()}
+        choices = sorted(counts, key=counts.get, reverse=True)[:MAP_SKILL_CHOICES]
+    _choices = (source, choices)
+    return choices
+
+
+def _weighted(groups):
+    """{clé: [(lat, lon, n)]} -> [(clé, lat, lon, total)] au barycentre pondéré."""
+    points = []
+    for key, members in groups.items():
+        total = sum(n for _, _, n in members)
+        lat = sum(la * n for la, _, n in members) / total
+        lon = sum(lo * n for _, lo, n in members) / total
+        points.append((key, lat, lon, total))
+    return points
+
+
+def aggregate(ville_counts: dict, level: str, communes):
+    """Points [(nom, lat, lon, offres)] du niveau demandé et offres non localisées."""
+    located, unmatched = [], 0
+    for ville, n in ville_counts.items():
+        commune = communes.lookup(ville)
+        if commune is None:
+            unmatched += n
+        else:
+            located.append((ville, commune, n))
+
+    if level == "ville":
+        if len(located) <= MAP_MAX_MARKERS:
+            return [(v, c.lat, c.lon, n) for v, c, n in located], unmatched
+        # trop de villes : une maille, nommée d'après sa ville principale
+        cells, names = defaultdict(list), {}
+        for ville, c, n in located:
+            cell = (int(c.lat // MAP_GRID_DEGREES), int(c.lon // MAP_GRID_DEGREES))
+            cells[cell].append((c.lat, c.lon, n))
+            if n > names.get(cell, ("", 0))[1]:
+                names[cell] = (ville, n)
+        points = []
+        for cell, lat, lon, total in _weighted(cells):
+            others = len(cells[cell]) - 1
+            name = names[cell][0]
+            if others:
+                name += f" et {others} autre{'s' if others > 1 else ''}"
+            points.append((name, lat, lon, total))
+        return points, unmatched
+
+    groups = defaultdict(list)
+    for _, c, n in located:
+        key = c.departement if level == "departement" else c.region
+        if key is None:
+            unmatched += n
+        else:
+            groups[key].append((c.lat, c.lon, n))
+    return _weighted(groups), unmatched
+
+
+def figure_html(points, level: str) -> str:
+    import plotly.express as px
+
+    data = {
+        "nom": [p[0] for p in points],
+        "lat": [p[1] for p in points],
+        "lon": [p[2] for p in points],
+        "offres": [p[3] for p in points],
+    }
+    fig = px.scatter_map(
+        data, lat="lat", lon="lon", size="offres", color="offres", hover_name="nom",
+        hover_data={"lat": False, "lon": False, "offres": True},
+        size_max=45 if level != "ville" else 25, zoom=4.4, center={"lat": 46.6, "lon": 2.4},
+        height=MAP_HEIGHT, color_continuous_scale="Blues",
+    )
+    fig.update_layout(margin={"l": 0, "r": 0, "t": 0, "b": 0})
+    return fig.to_html(include_plotlyjs="cdn", full_html=False, config={"displaylogo": False})
+
+
+_figures = OrderedDict()    # (version de la source, niveau, compétence) -> (html, points, non localisées)
+_figures_lock = threading.Lock()
+
+
+def map_figure(api_base_url: str, level: str, skill=None):
+    """(HTML de la figure, nombre de points, offres non localisées), depuis le cache si possible."""
+    source = _source(api_base_url)
+    key = (source.version, level, skill)
+    with _figures_lock:
+        cached = _figures.get(key)
+        if cached is not None:
+            _figures.move_to_end(key)
+            tracing.incr("cache_hits_total", cache="map")
+            return cached
+    tracing.incr("cache_misses_total", cache="map")
+
+    with tracing.span("map_figure"):
+        points, unmatched = aggregate(_ville_counts(source, skill), level, get_communes())
+        html = figure_html(points, level)
+    result = (html, len(points), unmatched)
+    with _figures_lock:
+        _figures[key] = result
+        while len(_figures) > MAP_FIGURE_CACHE_SIZE:
+            _figures.popitem(last=False)
+    return result
+
+
+def map_page(api_base_url: str):
+    """Page carte : niveau géographique, compétence optionnelle, figure en cache."""
+    import streamlit as st
+    import streamlit.components.v1 as components
+
+    st.title("🗺️ Carte des offres")
+    level = st.radio("Niveau", list(LEVELS), format_func=LEVELS.get, horizontal=True, key="map_level")
+    with st.spinner("Agrégation des offres…"):
+        try:
+            skill = st.selectbox("Compétence", [""] + skill_choices(_source(api_base_url)), key="map_skill",
+                                 format_func=lambda s: s or "Toutes les compétences")
+            html, n_points, unmatched = map_figure(api_base_url, level, skill or None)
+        except Exception as e:
+            st.error(f"❌ Carte indisponible : {e}")
+            return
+    components.html(html, height=MAP_HEIGHT + 20)
+    caption = f"{n_points} points"
+    if unmatched:
+        caption += f" – {unmatched} offres non localisées"
+    st.caption(caption)
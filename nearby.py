@@ -0,0 +1,110 @@
+"""Filtre « autour de moi » : villes à moins d'un rayon de la position du navigateur.
+
+Les villes du vocabulaire sont placées une fois sur une grille de
+`NEAR_GRID_DEGREES` degrés à partir du référentiel des communes (aucun appel
+de géocodage par recherche). Une requête ne parcourt que les mailles du carré
+englobant le cercle et calcule les distances (haversine) en une opération
+numpy sur leurs villes. L'index n'est reconstruit que si le vocabulaire des
+villes ou le référentiel change.
+
+La position vient du navigateur (`streamlit_js_eval.get_geolocation`) ; les
+villes trouvées alimentent les paramètres `("ville", v)` habituels.
+"""
+import math
+import os
+from collections import defaultdict
+
+from communes import get_communes
+from derived import Derived
+
+NEAR_RADIUS_KM = int(os.getenv("NEAR_RADIUS_KM", 25))
+NEAR_MAX_RADIUS_KM = int(os.getenv("NEAR_MAX_RADIUS_KM", 200))
+NEAR_MAX_VILLES = int(os.getenv("NEAR_MAX_VILLES", 300))
+NEAR_GRID_DEGREES = 0.5
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class VilleGrid:
+    """Villes localisées, rangées par maille de la grille."""
+
+    def __init__(self, villes, communes, cell_degrees: float = NEAR_GRID_DEGREES):
+        import numpy as np
+
+        names, lats, lons = [], [], []
+        for ville in villes:
+            commune = communes.lookup(ville)
+            if commune is not None:
+                names.append(ville)
+                lats.append(commune.lat)
+                lons.append(commune.lon)
+        self.names = names
+        self.cell_degrees = cell_degrees
+        self.lat = np.radians(np.asarray(lats, dtype=np.float64))
+        self.lon = np.radians(np.asarray(lons, dtype=np.float64))
+        cells = defaultdict(list)
+        for i, (la, lo) in enumerate(zip(lats, lons)):
+            cells[self._cell(la, lo)].append(i)
+        self.cells = {cell: np.asarray(members, dtype=np.intp) for cell, members in cells.items()}
+
+    def _cell(self, lat, lon):
+        return int(lat // self.cell_degrees), int(lon // self.cell_degrees)
+
+    def _candidates(self, lat, lon, radius_km):
+        import numpy as np
+
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = min(dlat / max(math.cos(math.radians(min(abs(lat) + dlat, 89.9))), 1e-6), 180.0)
+        (lat0, lon0), (lat1, lon1) = self._cell(lat - dlat, lon - dlon), self._cell(lat + dlat, lon + dlon)
+        found = [self.cells[(i, j)] for i in range(lat0, lat1 + 1) for j in range(lon0, lon1 + 1)
+                 if (i, j) in self.cells]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.intp)
+
+    def within(self, lat: float, lon: float, radius_km: float, limit: int = NEAR_MAX_VILLES):
+        """[(ville, km)] à moins de `radius_km`, des plus proches aux plus lointaines."""
+        import numpy as np
+
+        idx = self._candidates(lat, lon, radius_km)
+        if not len(idx):
+            return []
+        phi, lam = math.radians(lat), math.radians(lon)
+        a = (np.sin((self.lat[idx] - phi) / 2) ** 2
+             + math.cos(phi) * np.cos(self.lat[idx]) * np.sin((self.lon[idx] - lam) / 2) ** 2)
+        km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        inside = km <= radius_km
+        idx, km = idx[inside], km[inside]
+        order = np.argsort(km, kind="stable")[:limit]
+        return [(self.names[i], float(d)) for i, d in zip(idx[order], km[order])]
+
+
+_current = Derived(VilleGrid)
+
+
+def get_ville_grid(villes) -> VilleGrid:
+    """Index courant, reconstruit seulement quand les villes ou le référentiel changent."""
+    return _current.get(villes, get_communes())
+
+
+def near_me_picker(villes, key: str = "near_me"):
+    """Interrupteur, rayon et position du navigateur ; villes dans le rayon, ou None si inactif."""
+    import streamlit as st
+
+    if not st.toggle("📍 Autour de moi", key=f"{key}_on"):
+        return None
+    radius = st.slider("Rayon (km)", 5, NEAR_MAX_RADIUS_KM, NEAR_RADIUS_KM, step=5, key=f"{key}_km")
+    from streamlit_js_eval import get_geolocation  # composant chargé seulement si le filtre est actif
+    location = get_geolocation(component_key=f"{key}_position")
+    coords = (location or {}).get("coords") or {}
+    if coords.get("latitude") is None or coords.get("longitude") is None:
+        st.caption("En attente de la position (autorisez la localisation dans le navigateur)…")
+        return None
+    try:
+        found = get_ville_grid(villes).within(coords["latitude"], coords["longitude"], radius)
+    except Exception as e:
+        st.warning(f"Recherche autour de moi indisponible : {e}")
+        return None
+    caption = f"{len(found)} villes à moins de {radius} km"
+    if len(found) == NEAR_MAX_VILLES:
+        caption += " (les plus proches)"
+    st.caption(caption)
+    return [ville for ville, _ in found]
@@ -0,0 +1,77 @@
+"""Rendu HTML d'une page d'offres en un seul bloc.
+
+Une page entière devient une seule chaîne HTML (donc un seul `st.markdown`,
+un seul delta websocket) ; la grille est faite en CSS (`.offer-grid`). Le
+HTML de chaque carte est mémorisé par identifiant d'offre.
+"""
+import threading
+from collections import OrderedDict
+from html import escape
+from string import Template
+
+import tracing
+from skills import normalize_offers, parse_skills
+
+OFFER_HTML_CACHE_SIZE = 4096
+
+# Cartes sur une ligne : pas d'indentation que le markdown prendrait pour du code.
+TEMPLATES = {
+    "job": Template(
+        '<div class="job-card"><h4>🎯 $title</h4>'
+        '<div class="job-meta"><div>📍 $ville — $region</div><div>💼 $contrat</div>'
+        '<div>🔗 <a class="clean" href="$url" target="_blank">Voir l\'offre</a></div></div>'
+        '<div class="badges">$badges</div></div>'
+    ),
+    "metric": Template(
+        '<div class="metric-card"><h4>$title</h4>'
+        '<p><strong>📍 Lieu:</strong> $ville ($region)</p>'
+        '<p><strong>💼 Contrat:</strong> $contrat</p>'
+        '<p><strong>🛠️ Compétences:</strong> $skills</p>'
+        '<p><strong>🔗 Lien:</strong> <a href="$url" target="_blank">Voir l\'offre</a></p></div>'
+    ),
+}
+
+_html_cache = OrderedDict()
+_html_cache_lock = threading.Lock()
+
+
+def _offer_key(offre: dict):
+    offer_id = offre.get("ID") or offre.get("SOURCE_URL")
+    if offer_id:
+        return offer_id
+    return (offre.get("TITLE"), offre.get("VILLE"), offre.get("TYPE_CONTRAT"), str(offre.get("SKILLS")))
+
+
+def offer_html(offre: dict, layout: str = "job", skills=None) -> str:
+    key = (layout, _offer_key(offre))
+    with _html_cache_lock:
+        html = _html_cache.get(key)
+        if html is not None:
+            _html_cache.move_to_end(key)
+            return html
+
+    if skills is None:
+        skills = parse_skills(offre.get("SKILLS"))
+    skills = [escape(s) for s in skills[:10]]
+    html = TEMPLATES[layout].substitute(
+        title=escape(str(offre.get("TITLE") or "Titre non disponible")),
+        ville=escape(str(offre.get("VILLE") or "Non spécifié")),
+        region=escape(str(offre.get("REGION") or "Région non spécifiée")),
+        contrat=escape(str(offre.get("TYPE_CONTRAT") or "Non spécifié")),
+        url=escape(str(offre.get("SOURCE_URL") or "#"), quote=True),
+        badges="".join(f'<span class="badge">{s}</span>' for s in skills),
+        skills=", ".join(skills),
+    )
+    with _html_cache_lock:
+        _html_cache[key] = html
+        if len(_html_cache) > OFFER_HTML_CACHE_SIZE:
+            _html_cache.popitem(last=False)
+    return html
+
+
+def render_offers_html(offres, layout: str = "job") -> str:
+    """HTML d'une page d'offres entière, à passer à un unique `st.markdown`."""
+    per_offer = normalize_offers(offres)
+    with tracing.span("html_render"):
+        cards = (offer_html(o, layout, skills) for o, skills in zip(offres, per_offer))
+        return '<div class="offer-grid">' + "".join(cards) + "</div>"
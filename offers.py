@@ -0,0 +1,98 @@
+"""Offres des pages de résultats en enregistrements compacts.
+
+Les pages affichées ne lisent que quelques champs de chaque offre : ceux de
+`OFFER_FIELDS`. Ils sont demandés au backend (`fields=...`, ignoré par un
+backend qui ne le gère pas) puis chaque offre est décodée en `Offer`, objet à
+`__slots__` bien plus léger qu'un dict, SKILLS déjà parsé et chaînes
+répétées (ville, région, contrat) internées. `Offer.get` garde l'interface
+des dicts pour le rendu, les statistiques et la carte.
+
+Le JSON passe par orjson s'il est installé, sinon par le module standard.
+`OFFER_FIELDS=` (vide) désactive la projection : les offres restent des
+dicts complets.
+"""
+import json
+import os
+import sys
+
+from skills import parse_skills
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FIELDS_PARAM = "fields"
+DEFAULT_FIELDS = ("ID", "TITLE", "VILLE", "REGION", "TYPE_CONTRAT", "SOURCE_URL", "SKILLS")
+OFFER_FIELDS = tuple(f for f in os.getenv("OFFER_FIELDS", ",".join(DEFAULT_FIELDS)).split(",") if f)
+
+_FIELD_SET = frozenset(OFFER_FIELDS)
+_INTERNED = frozenset({"VILLE", "REGION", "TYPE_CONTRAT"})
+
+
+def loads(raw):
+    """Décode du JSON (bytes ou str)."""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+class Offer:
+    """Offre réduite aux champs de `OFFER_FIELDS`, lisible comme un dict."""
+
+    __slots__ = OFFER_FIELDS
+
+    def __init__(self, row: dict):
+        for field in OFFER_FIELDS:
+            value = row.get(field)
+            if field == "SKILLS":
+                value = parse_skills(value)
+            elif field in _INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, field, value)
+
+    def get(self, field, default=None):
+        value = getattr(self, field) if field in _FIELD_SET else None
+        return default if value is None else value
+
+    def __getitem__(self, field):
+        if field not in _FIELD_SET:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __iter__(self):
+        return iter(OFFER_FIELDS)
+
+    def keys(self):
+        return OFFER_FIELDS
+
+    def items(self):
+        return [(field, getattr(self, field)) for field in OFFER_FIELDS]
+
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in OFFER_FIELDS)
+
+    def __setstate__(self, state):
+        for field, value in zip(OFFER_FIELDS, state):
+            setattr(self, field, value)
+
+    def __repr__(self):
+        return f"Offer({dict(self.items())!r})"
+
+
+def projection_params() -> list:
+    """Paramètres de requête demandant au backend les seuls champs affichés."""
+    return [(FIELDS_PARAM, ",".join(OFFER_FIELDS))] if OFFER_FIELDS else []
+
+
+def covers(fields) -> bool:
+    """Les pages en cache contiennent-elles `fields` (None : tous les champs) ?"""
+    if not OFFER_FIELDS:
+        return True
+    return fields is not None and _FIELD_SET.issuperset(fields)
+
+
+def decode_page(raw, project: bool = True) -> dict:
+    """Réponse /search décodée ; avec `project`, offres en `Offer`."""
+    data = loads(raw)
+    if project and OFFER_FIELDS and isinstance(data, dict) and data.get("data"):
+        data["data"] = [Offer(row) for row in data["data"]]
+    return data
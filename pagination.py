@@ -0,0 +1,83 @@
+"""Pagination des résultats de /search : curseur quand le backend le permet.
+
+Par jeu de filtres canonique, on retient le `total_count` de la première
+réponse et les curseurs de pages successives. Si le backend renvoie un
+`next_cursor` (la clé de tri de la dernière offre de la page), la page
+suivante est demandée avec `cursor=...` au lieu d'un `offset`, sans parcours
+des lignes précédentes, et avec `include_total=false` puisque le total est
+déjà connu ; ce total est alors ajouté à la page avant sa mise en cache,
+pour qu'elle reste complète une fois l'état du jeu de filtres oublié ou lue
+par un autre réplica. Un backend qui ne renvoie pas de curseur reste servi en
+mode offset.
+
+Les pages sont toujours rangées dans le cache de /search sous leur clé
+logique (filtres, limit, offset), quel que soit le mode utilisé.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from search_cache import SEARCH_CACHE_TTL_SECONDS, canonical_key, search
+
+CURSOR_PARAM = "cursor"
+NEXT_CURSOR_FIELD = "next_cursor"
+INCLUDE_TOTAL_PARAM = "include_total"
+MAX_FILTER_SETS = 1024
+# compté depuis le dernier usage ; les pages en cache portent de toute façon leur total
+STATE_TTL_SECONDS = 2 * SEARCH_CACHE_TTL_SECONDS
+
+
+class _FilterSetState:
+    def __init__(self):
+        self.total_count = None
+        self.cursors = {}       # n° de page -> curseur permettant de la demander
+        self.used = time.monotonic()
+
+
+_states = OrderedDict()
+_lock = threading.Lock()
+
+
+def _state_for(filters_key) -> _FilterSetState:
+    with _lock:
+        state = _states.get(filters_key)
+        now = time.monotonic()
+        if state is None or now - state.used > STATE_TTL_SECONDS:
+            state = _states[filters_key] = _FilterSetState()
+        state.used = now
+        _states.move_to_end(filters_key)
+        while len(_states) > MAX_FILTER_SETS:
+            _states.popitem(last=False)
+        return state
+
+
+def page_params(filter_params, page: int, limit: int) -> list:
+    """Paramètres logiques (mode offset) de la page `page`."""
+    return list(filter_params) + [("limit", limit), ("offset", page * limit)]
+
+
+def fetch_page(api_base_url: str, filter_params, page: int, limit: int) -> dict:
+    """Page `page` (0-indexée) des résultats de `filter_params`."""
+    filters_key = canonical_key(filter_params)
+    state = _state_for(filters_key)
+    logical = page_params(filter_params, page, limit)
+
+    request, defaults = logical, None
+    cursor = state.cursors.get(page)
+    if cursor is not None:
+        request = list(filter_params) + [("limit", limit), (CURSOR_PARAM, cursor)]
+        if state.total_count is not None:
+            request.append((INCLUDE_TOTAL_PARAM, "false"))
+            # le total connu est écrit dans la page mise en cache (mémoire et disque partagé)
+            defaults = {"total_count": state.total_count}
+
+    data = search(api_base_url, logical, request_params=request, defaults=defaults)
+
+    if "total_count" in data:
+        state.total_count = data["total_count"]
+    elif state.total_count is not None:
+        data = dict(data, total_count=state.total_count)
+    next_cursor = data.get(NEXT_CURSOR_FIELD)
+    if next_cursor is not None:
+        state.cursors[page + 1] = next_cursor
+    return data
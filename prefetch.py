@@ -0,0 +1,81 @@
+"""Préchargement en arrière-plan des pages de résultats suivantes.
+
+Quand la page N s'affiche, les pages N+1 .. N+PREFETCH_DEPTH sont demandées
+sur le pool de `api_client` et rangées dans le cache de /search : le clic sur
+« page suivante » est alors servi depuis la mémoire.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import api_client
+from pagination import fetch_page, page_params
+from search_cache import SEARCH_CACHE, canonical_key
+
+PREFETCH_DEPTH = int(os.getenv("PREFETCH_DEPTH", 1))
+PREFETCH_MAX_PER_MINUTE = int(os.getenv("PREFETCH_MAX_PER_MINUTE", 30))
+
+
+class Prefetcher:
+    """Préchargements d'une session : annulés au changement de filtres, plafonnés par minute."""
+
+    def __init__(self, depth: int = PREFETCH_DEPTH, max_per_minute: int = PREFETCH_MAX_PER_MINUTE):
+        self.depth = depth
+        self.max_per_minute = max_per_minute
+        self._filters_key = None
+        self._futures = []
+        self._issued = deque()      # horodatages des préchargements lancés
+        self._lock = threading.Lock()
+
+    def schedule(self, api_base_url: str, filter_params, page: int, limit: int, total_pages: int):
+        filters_key = canonical_key(filter_params)
+        with self._lock:
+            if filters_key != self._filters_key:
+                self._cancel_locked()
+                self._filters_key = filters_key
+            self._futures = [f for f in self._futures if not f.done()]
+
+            last_page = min(page + self.depth, total_pages - 1)
+            pages = [n for n in range(page + 1, last_page + 1)
+                     if canonical_key(page_params(filter_params, n, limit)) not in SEARCH_CACHE]
+            pages = [n for n in pages if self._take_budget()]
+            if pages:
+                # une seule tâche, dans l'ordre : chaque page fournit le curseur de la suivante
+                self._futures.append(
+                    api_client.submit(self._fetch, api_base_url, filter_params, pages, limit, filters_key)
+                )
+
+    def cancel(self):
+        with self._lock:
+            self._cancel_locked()
+
+    def _cancel_locked(self):
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+        self._filters_key = None
+
+    def _take_budget(self) -> bool:
+        now = time.monotonic()
+        while self._issued and now - self._issued[0] > 60:
+            self._issued.popleft()
+        if len(self._issued) >= self.max_per_minute:
+            return False
+        self._issued.append(now)
+        return True
+
+    def _fetch(self, api_base_url, filter_params, pages, limit, filters_key):
+        for n in pages:
+            if filters_key != self._filters_key:
+                return  # filtres modifiés entre-temps
+            try:
+                fetch_page(api_base_url, filter_params, n, limit)
+            except Exception:
+                return  # la page sera redemandée normalement si besoin
+
+
+def get_prefetcher(session_state) -> Prefetcher:
+    if "prefetcher" not in session_state:
+        session_state.prefetcher = Prefetcher()
+    return session_state.prefetcher
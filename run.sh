@@ -26,7 +26,8 @@ pip install -r requirements.txt
 # Lancer l'application
 echo "🌐 Lancement de l'application Streamlit..."
 echo "📍 L'application sera accessible à l'adresse : http://localhost:8501"
+echo "🔥 Préchauffage des caches en arrière-plan (voir warmup.py)"
 echo "🔄 Appuyez sur Ctrl+C pour arrêter l'application"
 echo ""
 
-streamlit run main.py --server.port=8501 --server.address=0.0.0.0 
\ No newline at end of file
+python warmup.py main.py --server.port=8501 --server.address=0.0.0.0 
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""Cache LRU + TTL des réponses de /search.
+
+La clé est une forme canonique des paramètres : l'ordre de sélection des
+valeurs d'un filtre n'a pas d'importance (["Paris", "Lyon"] et
+["Lyon", "Paris"] donnent la même entrée), `limit` et `offset` en font partie.
+
+Les entrées expirées ne sont pas supprimées tout de suite : si le backend ne
+répond pas (démarrage à froid, disjoncteur ouvert), la dernière réponse connue
+est servie, marquée `"stale": True`.
+
+Avec SHARED_CACHE_PATH, les réponses sont aussi écrites dans le cache disque
+partagé entre réplicas, consulté après la mémoire et avant le backend ; il
+fournit aussi la réponse de secours si la mémoire n'en a pas. Les pages mises
+en cache ne gardent que les champs affichés, en enregistrements `offers.Offer`.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import api_client
+import tracing
+from core.config import LOCAL_ENGINE
+from offers import FIELDS_PARAM, decode_page, loads, projection_params
+from shared_cache import SHARED_CACHE
+
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", 600))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 512))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+def canonical_key(params) -> tuple:
+    """Forme canonique et hashable d'une liste de paramètres (clé, valeur)."""
+    grouped = {}
+    for key, value in params:
+        grouped.setdefault(key, []).append(str(value))
+    return tuple((key, tuple(sorted(values))) for key, values in sorted(grouped.items()))
+
+
+class SearchCache:
+    """LRU borné en nombre d'entrées et en octets, avec expiration."""
+
+    def __init__(self, max_entries=SEARCH_CACHE_MAX_ENTRIES, max_bytes=SEARCH_CACHE_MAX_BYTES,
+                 ttl=SEARCH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()   # clé -> (valeur, taille, horodatage)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[2] > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_stale(self, key):
+        """Dernière valeur connue pour `key`, même expirée."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[0]
+
+    def __contains__(self, key):
+        """Présence d'une entrée valide, sans toucher aux compteurs ni à l'ordre LRU."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() - entry[2] <= self.ttl
+
+    def put(self, key, value, size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+SEARCH_CACHE = SearchCache()
+
+def local_snapshot(api_base_url: str):
+    """Snapshot du moteur local prêt à répondre, ou None (mode désactivé ou pas encore prêt)."""
+    if not LOCAL_ENGINE:
+        return None
+    import local_engine  # numpy/pandas : chargés seulement en mode moteur local
+    engine = local_engine.get_engine(api_base_url)
+    return engine.snapshot if engine is not None else None
+
+
+# requêtes en cours, pour ne pas envoyer deux fois la même (ex. page préchargée)
+INFLIGHT_WAIT_SECONDS = 60
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def search(api_base_url: str, params, timeout=None, request_params=None, store: bool = True,
+           defaults=None, fields=None) -> dict:
+    """Réponse JSON de /search pour `params`, servie depuis le cache si possible.
+
+    `request_params`, s'il est fourni, est ce qui part réellement au backend
+    (ex. pagination par curseur) ; la clé de cache reste celle de `params`.
+    `defaults` : champs ajoutés à la réponse s'ils y manquent, avant mise en
+    cache (ex. `total_count` d'une page demandée sans total).
+    Avec `store=False` (export en masse), la réponse n'est pas mise en cache ;
+    `fields` limite alors les champs demandés au backend (None : tous).
+
+    Lève `api_client.ApiError` si le backend ne répond pas 200 et qu'aucune
+    réponse antérieure n'est en cache pour ces paramètres. En mode moteur
+    local, la réponse vient du snapshot dès qu'il sait la calculer.
+    """
+    snapshot = local_snapshot(api_base_url)
+    if snapshot is not None:
+        data = snapshot.search(params)
+        if data is not None:
+            return data
+
+    key = canonical_key(params)
+    data = SEARCH_CACHE.get(key)
+    if data is not None:
+        tracing.incr("cache_hits_total", cache="search")
+        return data
+    tracing.incr("cache_misses_total", cache="search")
+
+    shared = _shared_page(key)
+    if shared is not None and shared[2]:
+        tracing.incr("cache_hits_total", cache="shared")
+        SEARCH_CACHE.put(key, shared[0], shared[1])
+        return shared[0]
+
+    # une copie de secours existe : on la sert dès le premier échec plutôt qu'après les réessais
+    retries = 0 if shared is not None or SEARCH_CACHE.get_stale(key) is not None else api_client.API_RETRIES
+    try:
+        if not store:
+            return _fetch(api_base_url, request_params or params, key, timeout, store=False, retries=retries,
+                          fields=fields)
+        return _search_once(api_base_url, request_params or params, key, timeout, retries, defaults)
+    except Exception as e:
+        if isinstance(e, api_client.ApiError) and e.status_code < 500:
+            raise
+        stale = SEARCH_CACHE.get_stale(key)
+        if stale is None and shared is not None:
+            stale = shared[0]  # expirée sur disque, mais mieux que rien
+        if stale is None:
+            raise
+        tracing.incr("stale_served_total", cache="search")
+        return dict(stale, stale=True)
+
+
+def _shared_page(key):
+    """(page, taille, encore valide) depuis le cache disque partagé, ou None.
+
+    Une entrée illisible est supprimée et traitée comme absente.
+    """
+    if SHARED_CACHE is None:
+        return None
+    entry = SHARED_CACHE.get("search", repr(key))
+    if entry is None:
+        return None
+    try:
+        return decode_page(entry[0]), len(entry[0]), entry[1]
+    except ValueError:
+        SHARED_CACHE.delete("search", repr(key))
+        tracing.incr("shared_cache_errors_total")
+        return None
+
+
+def _search_once(api_base_url, params, key, timeout, retries=api_client.API_RETRIES, defaults=None):
+    """Un seul appel réseau par clé à la fois, les appels concurrents attendent."""
+    with _inflight_lock:
+        pending = _inflight.get(key)
+        if pending is None:
+            _inflight[key] = threading.Event()
+    if pending is not None:
+        # même requête déjà partie : on attend sa réponse plutôt que d'en renvoyer une
+        pending.wait(INFLIGHT_WAIT_SECONDS)
+        data = SEARCH_CACHE.get(key)
+        if data is not None:
+            return data
+        return _fetch(api_base_url, params, key, timeout, retries=retries, defaults=defaults)
+
+    try:
+        return _fetch(api_base_url, params, key, timeout, retries=retries, defaults=defaults)
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key).set()
+
+
+def _fetch(api_base_url, params, key, timeout, store=True, retries=api_client.API_RETRIES, defaults=None,
+           fields=None):
+    if store:
+        params = list(params) + projection_params()
+    elif fields:
+        params = list(params) + [(FIELDS_PARAM, ",".join(fields))]
+    with tracing.span("search_request"):
+        response = api_client.get(f"{api_base_url}/search", params=params, timeout=timeout, retries=retries)
+    tracing.incr("bytes_received_total", len(response.content), endpoint="/search")
+    if response.status_code != 200:
+        raise api_client.ApiError(response.status_code)
+    content = response.content
+    with tracing.span("json_decode"):
+        data = decode_page(content, project=store)
+    missing = {k: v for k, v in (defaults or {}).items() if k not in data}
+    if missing:
+        data.update(missing)
+        content = json.dumps(dict(loads(content), **missing)).encode("utf-8")
+    if store:
+        SEARCH_CACHE.put(key, data, len(content))
+        if SHARED_CACHE is not None:
+            SHARED_CACHE.put("search", repr(key), content, SEARCH_CACHE_TTL_SECONDS)
+    return data
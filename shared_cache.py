@@ -0,0 +1,150 @@
+"""Second niveau de cache, sur disque, partagé entre process (SHARED_CACHE_PATH).
+
+Plusieurs réplicas de l'application peuvent pointer sur la même base SQLite
+(volume partagé) : un réplica qui démarre trouve les vocabulaires et les
+réponses /search déjà chargées par les autres, sans appeler le backend.
+
+La base est en mode WAL (lectures concurrentes, un écrivain à la fois, attente
+`busy_timeout` en cas de verrou) avec une connexion par thread. Chaque entrée
+a une date d'expiration ; une entrée expirée reste lisible comme valeur de
+secours. Au-delà de `SHARED_CACHE_MAX_BYTES`, les entrées les moins récemment
+lues sont supprimées. Toute erreur SQLite est traitée comme un défaut de
+cache : ce niveau ne fait jamais échouer une requête.
+
+SQLite s'appuie sur les verrous du système de fichiers : le volume doit être
+local au nœud (pas de NFS).
+"""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import tracing
+
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "")
+SHARED_CACHE_MAX_BYTES = int(os.getenv("SHARED_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# une entrée expirée depuis plus longtemps n'est plus gardée comme secours
+SHARED_CACHE_STALE_SECONDS = float(os.getenv("SHARED_CACHE_STALE_SECONDS", 7 * 86400))
+EVICTION_EVERY_PUTS = 50
+ACCESS_RESOLUTION_SECONDS = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    ns TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored REAL NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (ns, key)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+class SharedCache:
+    """Entrées (espace de noms, clé) -> octets, avec expiration et budget disque."""
+
+    def __init__(self, path: str, max_bytes: int = SHARED_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._puts = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connexion du thread courant, ouverte (et la base initialisée) au premier usage."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(_SCHEMA)
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._local.conn = conn
+        return conn
+
+    def get(self, ns: str, key: str):
+        """(octets, encore valide) ou None si absent ou illisible."""
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT value, expires, accessed FROM entries WHERE ns = ? AND key = ?",
+                               (ns, key)).fetchone()
+            if row is None:
+                return None
+            value, expires, accessed = row
+            now = time.time()
+            if now - accessed > ACCESS_RESOLUTION_SECONDS:
+                conn.execute("UPDATE entries SET accessed = ? WHERE ns = ? AND key = ?", (now, ns, key))
+            return zlib.decompress(value), now <= expires
+        except (sqlite3.Error, zlib.error):
+            tracing.incr("shared_cache_errors_total")
+            return None
+
+    def put(self, ns: str, key: str, value: bytes, ttl: float):
+        blob = zlib.compress(value)
+        now = time.time()
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO entries (ns, key, value, size, stored, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ns, key, blob, len(blob), now, now + ttl, now))
+        except sqlite3.Error:
+            tracing.incr("shared_cache_errors_total")
+            return
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % EVICTION_EVERY_PUTS == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Supprime les entrées trop anciennes, puis les moins lues jusqu'à revenir sous le budget."""
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM entries WHERE expires < ?", (time.time() - SHARED_CACHE_STALE_SECONDS,))
+                excess = (conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                          - self.max_bytes)
+                if excess > 0:
+                    freed = 0
+                    victims = []
+                    for ns, key, size in conn.execute("SELECT ns, key, size FROM entries ORDER BY accessed"):
+                        victims.append((ns, key))
+                        freed += size
+                        if freed >= excess:
+                            break
+                    conn.executemany("DELETE FROM entries WHERE ns = ? AND key = ?", victims)
+                    tracing.incr("cache_evictions_total", len(victims), cache="shared")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            tracing.incr("shared_cache_errors_total")
+
+    def delete(self, ns: str, key: str):
+        try:
+            self._connection().execute("DELETE FROM entries WHERE ns = ? AND key = ?", (ns, key))
+        except sqlite3.Error:
+            tracing.incr("shared_cache_errors_total")
+
+    def clear(self, ns=None):
+        try:
+            if ns is None:
+                self._connection().execute("DELETE FROM entries")
+            else:
+                self._connection().execute("DELETE FROM entries WHERE ns = ?", (ns,))
+        except sqlite3.Error:
+            tracing.incr("shared_cache_errors_total")
+
+
+# None si aucun chemin n'est configuré : un seul niveau de cache, en mémoire
+SHARED_CACHE = SharedCache(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None
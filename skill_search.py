@@ -0,0 +1,111 @@
+"""Recherche de compétences au fil de la frappe.
+
+Le vocabulaire `/skills/` peut compter des dizaines de milliers d'entrées :
+plutôt que de l'envoyer en entier au navigateur à chaque rerun, le sélecteur
+n'expose que les `SKILL_SUGGESTIONS` meilleures correspondances du texte
+saisi, plus les compétences déjà choisies.
+
+L'index est construit une fois par vocabulaire, sur des clés repliées
+(minuscules, sans accents) : une liste triée pour les préfixes (bisect) et
+des listes de trigrammes pour les sous-chaînes. À correspondance égale, les
+compétences les plus fréquentes (comptes du snapshot local, si disponible)
+passent en premier.
+"""
+import heapq
+import os
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from derived import Derived
+
+SKILL_SUGGESTIONS = int(os.getenv("SKILL_SUGGESTIONS", 20))
+QUERY_MEMO_SIZE = 1024
+
+
+def fold(text: str) -> str:
+    """Clé de comparaison : minuscules, accents retirés."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _trigrams(key: str):
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+class SkillIndex:
+    def __init__(self, skills, weights=None):
+        self.skills = list(dict.fromkeys(skills))
+        self.weights = weights or {}
+        self._folded = [fold(s) for s in self.skills]
+        self._sorted = sorted((key, i) for i, key in enumerate(self._folded))
+        self._keys = [key for key, _ in self._sorted]
+        postings = defaultdict(list)
+        for i, key in enumerate(self._folded):
+            for gram in _trigrams(key):
+                postings[gram].append(i)
+        self._postings = {gram: frozenset(ids) for gram, ids in postings.items()}
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def _rank(self, i):
+        return (-self.weights.get(self.skills[i], 0), len(self._folded[i]), self._folded[i])
+
+    def search(self, query: str, k: int = SKILL_SUGGESTIONS) -> list:
+        """Au plus `k` compétences : préfixes d'abord, puis sous-chaînes."""
+        q = fold(query).strip()
+        memo_key = (q, k)
+        with self._lock:
+            cached = self._memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        if not q:
+            ids = heapq.nsmallest(k, range(len(self.skills)), key=self._rank)
+        else:
+            start = bisect_left(self._keys, q)
+            prefix = []
+            for key, i in self._sorted[start:]:
+                if not key.startswith(q):
+                    break
+                prefix.append(i)
+            ids = heapq.nsmallest(k, prefix, key=self._rank)
+            if len(ids) < k:
+                ids += heapq.nsmallest(k - len(ids), self._substring(q, exclude=set(prefix)), key=self._rank)
+        result = [self.skills[i] for i in ids]
+
+        with self._lock:
+            if len(self._memo) >= QUERY_MEMO_SIZE:
+                self._memo.clear()
+            self._memo[memo_key] = result
+        return result
+
+    def _substring(self, q: str, exclude):
+        if len(q) < 3:
+            candidates = range(len(self.skills))
+        else:
+            lists = sorted((self._postings.get(gram, frozenset()) for gram in _trigrams(q)), key=len)
+            candidates = lists[0].intersection(*lists[1:])
+        return [i for i in candidates if i not in exclude and q in self._folded[i]]
+
+
+_current = Derived(SkillIndex)
+
+
+def get_skill_index(skills, weights=None) -> SkillIndex:
+    """Index du vocabulaire courant, reconstruit seulement quand il change."""
+    return _current.get(skills, weights)
+
+
+def skill_picker(label, index: SkillIndex, state_key, format_func=str, query_label="Rechercher une compétence",
+                 k: int = SKILL_SUGGESTIONS, **kwargs):
+    """Champ de recherche + multiselect limité aux compétences choisies et aux `k` meilleures suggestions."""
+    import streamlit as st
+
+    from geo_index import dependent_multiselect
+
+    query = st.text_input(query_label, key=f"{state_key}-query", placeholder="python, sql, données…")
+    selected = st.session_state.get(state_key, [])
+    options = list(dict.fromkeys(selected + index.search(query, k)))
+    return dependent_multiselect(label, options, state_key, format_func, **kwargs)
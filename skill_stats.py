@@ -0,0 +1,192 @@
+"""Compétences les plus demandées et co-occurrences sur tout le résultat d'une recherche.
+
+Pour un jeu de filtres, toutes les offres sont parcourues une fois par blocs
+(`export.iter_blocks`) dans un thread dédié, et chaque bloc est ajouté aux
+compteurs dès son arrivée : le panneau affiche des résultats partiels pendant
+le parcours. Les compétences sont codées en entiers et les paires d'une offre
+comptées dans un compteur creux (seules les paires rencontrées existent).
+
+Les statistiques sont partagées par le process et gardées par jeu de filtres
+canonique (mêmes clés que le cache de /search) : un rerun, ou une autre
+session avec les mêmes filtres, ne recalcule rien. Au plus
+`ANALYTICS_MAX_WALKS` parcours tournent à la fois dans le process, les autres
+attendent leur tour ; un parcours en erreur n'est relancé qu'après
+`ANALYTICS_ERROR_BACKOFF_SECONDS`.
+"""
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from html import escape
+from itertools import combinations
+
+import tracing
+from export import iter_blocks
+from search_cache import SEARCH_CACHE_TTL_SECONDS, canonical_key
+from skills import parse_skills
+
+ANALYTICS_TOP_SKILLS = int(os.getenv("ANALYTICS_TOP_SKILLS", 12))
+ANALYTICS_TTL_SECONDS = float(os.getenv("ANALYTICS_TTL_SECONDS", SEARCH_CACHE_TTL_SECONDS))
+ANALYTICS_MAX_FILTER_SETS = 64
+ANALYTICS_MAX_WALKS = int(os.getenv("ANALYTICS_MAX_WALKS", 2))
+ANALYTICS_ERROR_BACKOFF_SECONDS = float(os.getenv("ANALYTICS_ERROR_BACKOFF_SECONDS", 60))
+ANALYTICS_REFRESH_SECONDS = 1.5
+
+
+class SkillStats:
+    """Compteurs d'un jeu de filtres, alimentés bloc par bloc."""
+
+    def __init__(self):
+        self.codes = {}         # compétence -> code
+        self.skills = []        # code -> compétence
+        self.counts = Counter()
+        self.pairs = Counter()  # (code a, code b), a < b -> offres ayant les deux
+        self.offers = 0
+        self.total = None
+        self.done = False
+        self.error = None
+        self.created = time.monotonic()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def _code(self, skill):
+        code = self.codes.get(skill)
+        if code is None:
+            code = self.codes[skill] = len(self.skills)
+            self.skills.append(skill)
+        return code
+
+    def add(self, rows, total=None):
+        counts, pairs = Counter(), Counter()
+        for row in rows:
+            codes = sorted({self._code(s) for s in parse_skills(row.get("SKILLS"))})
+            counts.update(codes)
+            pairs.update(combinations(codes, 2))
+        with self._lock:
+            self.counts.update(counts)
+            self.pairs.update(pairs)
+            self.offers += len(rows)
+            if total is not None:
+                self.total = total
+
+    def top(self, k: int = ANALYTICS_TOP_SKILLS):
+        """[(compétence, offres)] des `k` compétences les plus fréquentes."""
+        with self._lock:
+            return [(self.skills[code], n) for code, n in self.counts.most_common(k)]
+
+    def matrix(self, k: int = ANALYTICS_TOP_SKILLS):
+        """(compétences, matrice) : co-occurrences entre les `k` plus fréquentes, diagonale = offres."""
+        with self._lock:
+            codes = [code for code, _ in self.counts.most_common(k)]
+            rows = [[self.counts[a] if a == b else self.pairs.get((min(a, b), max(a, b)), 0) for b in codes]
+                    for a in codes]
+        return [self.skills[code] for code in codes], rows
+
+
+_stats = OrderedDict()      # jeu de filtres canonique -> SkillStats
+_stats_lock = threading.Lock()
+_walks = threading.BoundedSemaphore(max(ANALYTICS_MAX_WALKS, 1))
+
+
+def _run(stats, key, api_base_url, filter_params, display_limit):
+    try:
+        with _walks:
+            with _stats_lock:
+                wanted = _stats.get(key) is stats
+            if not wanted:      # sorti du cache pendant l'attente : personne ne le lira
+                return
+            with tracing.span("skill_stats"):
+                for rows, total in iter_blocks(api_base_url, filter_params, display_limit, fields=("SKILLS",)):
+                    stats.add(rows, total)
+    except Exception as e:
+        stats.error = e
+    finally:
+        stats.finished = time.monotonic()
+        stats.done = True
+
+
+def get_skill_stats(api_base_url: str, filter_params, display_limit=None) -> SkillStats:
+    """Statistiques (éventuellement partielles) des filtres ; lance le parcours si besoin."""
+    key = canonical_key(filter_params)
+    with _stats_lock:
+        stats = _stats.get(key)
+        now = time.monotonic()
+        expired = stats is not None and stats.done and (
+            now - stats.created > ANALYTICS_TTL_SECONDS
+            or (stats.error is not None and now - stats.finished > ANALYTICS_ERROR_BACKOFF_SECONDS))
+        if stats is not None and not expired:
+            _stats.move_to_end(key)
+            tracing.incr("cache_hits_total", cache="skill_stats")
+            return stats
+        stats = _stats[key] = SkillStats()
+        while len(_stats) > ANALYTICS_MAX_FILTER_SETS:
+            _stats.popitem(last=False)
+    tracing.incr("cache_misses_total", cache="skill_stats")
+    threading.Thread(target=_run, args=(stats, key, api_base_url, list(filter_params), display_limit),
+                     name="skill-stats", daemon=True).start()
+    return stats
+
+
+def _top_html(top) -> str:
+    if not top:
+        return ""
+    peak = top[0][1]
+    bars = "".join(
+        f"<div style='margin:2px 0'><div style='font-size:0.85rem'>{escape(skill)} · {n}</div>"
+        f"<div style='background:#2563eb;height:6px;border-radius:3px;width:{100 * n / peak:.0f}%'></div></div>"
+        for skill, n in top
+    )
+    return f"<div>{bars}</div>"
+
+
+def _matrix_html(skills, rows) -> str:
+    if not skills:
+        return ""
+    peak = max(max(r) for r in rows) or 1
+    head = "".join(f"<th title='{escape(s)}'>{i + 1}</th>" for i, s in enumerate(skills))
+    body = "".join(
+        f"<tr><th style='text-align:left'>{i + 1}. {escape(skills[i])}</th>"
+        + "".join(f"<td style='background:rgba(37,99,235,{0.1 + 0.9 * n / peak:.2f});text-align:right'>{n}</td>"
+                  for n in row)
+        + "</tr>"
+        for i, row in enumerate(rows)
+    )
+    return f"<table style='font-size:0.75rem;border-collapse:collapse'><tr><th></th>{head}</tr>{body}</table>"
+
+
+def _render(stats: SkillStats):
+    import streamlit as st
+
+    if stats.error is not None:
+        st.warning(f"Analyse interrompue : {stats.error}")
+    if not stats.done:
+        st.progress(min(stats.offers / max(stats.total or 1, 1), 1.0),
+                    text=f"{stats.offers} / {stats.total or '…'} offres analysées")
+    st.markdown("**🏆 Compétences les plus demandées**")
+    st.markdown(_top_html(stats.top()), unsafe_allow_html=True)
+    skills, rows = stats.matrix()
+    if len(skills) > 1:
+        st.markdown("**🔗 Co-occurrences** (offres citant les deux compétences)")
+        st.markdown(_matrix_html(skills, rows), unsafe_allow_html=True)
+
+
+def _live(stats: SkillStats):
+    import streamlit as st
+
+    if stats.done:
+        st.rerun()  # parcours terminé : un dernier rerun complet arrête le rafraîchissement
+    _render(stats)
+
+
+def analytics_panel(api_base_url: str, filter_params, display_limit=None):
+    """Panneau d'analyse des compétences, rafraîchi pendant le parcours des offres."""
+    import streamlit as st
+
+    if ANALYTICS_TOP_SKILLS <= 0:
+        st.caption("Analyse des compétences désactivée.")
+        return
+    stats = get_skill_stats(api_base_url, filter_params, display_limit)
+    if stats.done:
+        _render(stats)
+    else:
+        st.fragment(run_every=ANALYTICS_REFRESH_SECONDS)(_live)(stats)
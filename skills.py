@@ -0,0 +1,54 @@
+"""Normalisation du champ SKILLS des offres.
+
+Le backend renvoie SKILLS soit en liste, soit en chaîne (JSON ou repr Python
+du type "['Python', 'SQL']"). Le parsing passe d'abord par `json.loads`,
+puis par une expression régulière pour les listes de chaînes simples, et
+seulement en dernier recours par `ast.literal_eval`. Les résultats sont
+mémorisés par chaîne brute : une même valeur n'est parsée qu'une fois.
+"""
+import json
+import re
+import sys
+from ast import literal_eval
+from functools import lru_cache
+from typing import List, Tuple
+
+import tracing
+
+SKILLS_PARSE_CACHE_SIZE = 65536
+
+_SIMPLE_LIST = re.compile(r"^\[\s*(?:'[^'\\]*'\s*(?:,\s*'[^'\\]*'\s*)*,?\s*)?\]$")
+_SIMPLE_ITEM = re.compile(r"'([^'\\]*)'")
+
+
+def _as_skills(values) -> Tuple[str, ...]:
+    return tuple(sys.intern(str(v)) for v in values)
+
+
+@lru_cache(maxsize=SKILLS_PARSE_CACHE_SIZE)
+def _parse_str(raw: str) -> Tuple[str, ...]:
+    try:
+        v = json.loads(raw)
+    except ValueError:
+        if _SIMPLE_LIST.match(raw):
+            return _as_skills(_SIMPLE_ITEM.findall(raw))
+        try:
+            v = literal_eval(raw)
+        except Exception:
+            return ()
+    return _as_skills(v) if isinstance(v, list) else ()
+
+
+def parse_skills(raw) -> Tuple[str, ...]:
+    """Liste de compétences d'une offre, sous forme de tuple (vide si illisible)."""
+    if isinstance(raw, (list, tuple)):
+        return _as_skills(raw)
+    if isinstance(raw, str):
+        return _parse_str(raw)
+    return ()
+
+
+def normalize_offers(offres) -> List[Tuple[str, ...]]:
+    """Compétences de chaque offre d'une page, parsées en une passe."""
+    with tracing.span("skills_parse"):
+        return [parse_skills(offre.get("SKILLS")) for offre in offres]
@@ -0,0 +1,52 @@
+"""Reprise des pages d'affichage en cache par les parcours de blocs."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.mock_backend import MockBackend, SyntheticData  # noqa: E402
+import export  # noqa: E402
+import offers  # noqa: E402
+from pagination import fetch_page  # noqa: E402
+from search_cache import SEARCH_CACHE  # noqa: E402
+
+FILTERS = [("region", "Région 00")]
+
+
+@pytest.fixture
+def backend():
+    server = MockBackend(SyntheticData(2000, 50, 40)).start()
+    SEARCH_CACHE.clear()
+    yield server
+    server.stop()
+    SEARCH_CACHE.clear()
+
+
+@pytest.mark.skipif(not offers.OFFER_FIELDS, reason="projection désactivée")
+def test_block_reuses_cached_pages_for_projected_fields(backend):
+    for page in range(2):
+        fetch_page(backend.url, FILTERS, page, 20)
+
+    block = export._cached_block(FILTERS, 0, 40, 20, fields=("SKILLS",))
+    assert block is not None
+    assert len(block["data"]) == 40
+
+    total = fetch_page(backend.url, FILTERS, 0, 20)["total_count"]
+    for page in range(2, (total + 19) // 20):
+        fetch_page(backend.url, FILTERS, page, 20)
+    backend.reset()
+    blocks = list(export.iter_blocks(backend.url, FILTERS, display_limit=20, page_size=40,
+                                     fields=("VILLE", "SKILLS")))
+    assert sum(len(rows) for rows, _ in blocks) == total
+    assert backend.total_calls() == 0
+
+
+@pytest.mark.skipif(not offers.OFFER_FIELDS, reason="projection désactivée")
+def test_block_with_all_fields_is_refetched(backend):
+    for page in range(2):
+        fetch_page(backend.url, FILTERS, page, 20)
+    assert export._cached_block(FILTERS, 0, 40, 20, fields=None) is None
@@ -0,0 +1,32 @@
+"""Synchronisation du moteur local contre le backend de substitution."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+pytest.importorskip("pandas")
+
+from bench.mock_backend import MockBackend, SyntheticData  # noqa: E402
+import local_engine  # noqa: E402
+
+
+@pytest.fixture
+def backend():
+    server = MockBackend(SyntheticData(1200, 50, 40)).start()
+    yield server
+    server.stop()
+
+
+def test_sync_builds_snapshot(backend, tmp_path):
+    engine = local_engine.LocalEngine(backend.url, path=str(tmp_path / "offers"))
+    engine.sync()
+
+    assert engine.snapshot is not None
+    assert engine.snapshot.size == 1200
+    data = engine.snapshot.search([("limit", 20), ("offset", 0)])
+    assert data["total_count"] == 1200
+    assert len(data["data"]) == 20
@@ -0,0 +1,188 @@
+"""Chronométrage des phases d'un rerun et compteurs de l'application.
+
+    with tracing.rerun_trace("profil"):
+        with tracing.span("search_request"):
+            ...
+        tracing.incr("cache_hits_total", cache="search")
+
+Chaque rerun produit une trace (durée par phase, compteurs du rerun)
+affichable dans le panneau de debug de la sidebar (`DEBUG_PANEL=1` ou
+`?debug=1` dans l'URL), ajoutée en JSONL à `TRACE_JSONL` si la variable est
+définie. Les durées alimentent aussi des histogrammes process-wide, exportés
+au format texte Prometheus dans `METRICS_PROM_FILE` (collecteur textfile).
+Les spans ouverts hors rerun (threads de préchargement) ne vont que dans les
+métriques globales.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+TRACE_JSONL = os.getenv("TRACE_JSONL")
+METRICS_PROM_FILE = os.getenv("METRICS_PROM_FILE")
+DEBUG_PANEL = os.getenv("DEBUG_PANEL", "") not in ("", "0", "false")
+
+# bornes (secondes) des histogrammes de latence
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class RerunTrace:
+    def __init__(self, page: str):
+        self.page = page
+        self.started = time.time()
+        self.total = None
+        self.spans = defaultdict(lambda: [0.0, 0])    # nom -> [secondes, appels]
+        self.counters = defaultdict(float)
+
+
+class _Metrics:
+    """Histogrammes et compteurs cumulés sur la vie du process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}    # nom -> [comptes par borne..., +Inf], somme
+        self.counters = defaultdict(float)
+
+    def observe(self, name, seconds):
+        with self.lock:
+            counts, total = self.histograms.get(name, ([0] * (len(BUCKETS) + 1), 0.0))
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self.histograms[name] = (counts, total + seconds)
+
+    def incr(self, key, value):
+        with self.lock:
+            self.counters[key] += value
+
+
+METRICS = _Metrics()
+_local = threading.local()
+_jsonl_lock = threading.Lock()
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def span(name: str):
+    """Chronomètre le bloc sous le nom de phase `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        METRICS.observe(name, elapsed)
+        trace = current_trace()
+        if trace is not None:
+            entry = trace.spans[name]
+            entry[0] += elapsed
+            entry[1] += 1
+
+
+def incr(name: str, value: float = 1, **labels):
+    """Incrémente un compteur (ex. bytes_received_total, cache_hits_total{cache=...})."""
+    key = (name, tuple(sorted(labels.items())))
+    METRICS.incr(key, value)
+    trace = current_trace()
+    if trace is not None:
+        trace.counters[_format_key(key)] += value
+
+
+@contextmanager
+def rerun_trace(page: str = ""):
+    """Délimite un rerun : trace courante du thread de script, émise en sortie.
+
+    Imbriqué dans un rerun en cours (fragment exécuté par un rerun complet),
+    le bloc s'ajoute à la trace englobante au lieu d'en ouvrir une nouvelle.
+    """
+    outer = current_trace()
+    if outer is not None:
+        yield outer
+        return
+    trace = RerunTrace(page)
+    _local.trace = trace
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace.total = time.perf_counter() - start
+        _local.trace = None
+        METRICS.observe("rerun", trace.total)
+        _emit(trace)
+
+
+def trace_record(trace: RerunTrace) -> dict:
+    return {
+        "ts": round(trace.started, 3),
+        "page": trace.page,
+        "total_ms": None if trace.total is None else round(trace.total * 1000, 2),
+        "spans": {name: {"ms": round(s * 1000, 2), "calls": n} for name, (s, n) in trace.spans.items()},
+        "counters": dict(trace.counters),
+    }
+
+
+def render_prometheus() -> str:
+    lines = []
+    with METRICS.lock:
+        histograms = {k: (list(c), t) for k, (c, t) in METRICS.histograms.items()}
+        counters = dict(METRICS.counters)
+    if histograms:
+        lines.append("# TYPE app_phase_seconds histogram")
+    for name, (counts, total) in sorted(histograms.items()):
+        for bound, count in zip(BUCKETS, counts):
+            lines.append(f'app_phase_seconds_bucket{{phase="{name}",le="{bound}"}} {count}')
+        lines.append(f'app_phase_seconds_bucket{{phase="{name}",le="+Inf"}} {counts[-1]}')
+        lines.append(f'app_phase_seconds_sum{{phase="{name}"}} {total:.6f}')
+        lines.append(f'app_phase_seconds_count{{phase="{name}"}} {counts[-1]}')
+    for key, value in sorted(counters.items()):
+        lines.append(f"app_{_format_key(key)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def _format_key(key) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def _emit(trace: RerunTrace):
+    if TRACE_JSONL:
+        line = json.dumps(trace_record(trace), ensure_ascii=False)
+        with _jsonl_lock, open(TRACE_JSONL, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    if METRICS_PROM_FILE:
+        tmp = f"{METRICS_PROM_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(render_prometheus())
+        os.replace(tmp, METRICS_PROM_FILE)
+
+
+def debug_panel():
+    """Panneau sidebar des durées du rerun en cours (opt-in)."""
+    import streamlit as st
+
+    if not (DEBUG_PANEL or st.query_params.get("debug") == "1"):
+        return
+    trace = current_trace()
+    if trace is None:
+        return
+    with st.sidebar.expander("🐞 Performances du rerun", expanded=True):
+        elapsed = time.time() - trace.started
+        st.caption(f"Page : {trace.page or '-'} · {elapsed * 1000:.0f} ms jusqu'ici")
+        rows = [
+            {"phase": name, "ms": round(s * 1000, 1), "appels": n}
+            for name, (s, n) in sorted(trace.spans.items(), key=lambda kv: -kv[1][0])
+        ]
+        if rows:
+            st.table(rows)
+        if trace.counters:
+            st.json(dict(trace.counters), expanded=False)
+        from search_cache import SEARCH_CACHE  # import tardif : search_cache dépend de ce module
+        st.caption("Cache /search du process")
+        st.json(SEARCH_CACHE.stats(), expanded=False)
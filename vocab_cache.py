@@ -0,0 +1,152 @@
+"""Cache process-wide des vocabulaires de filtres (villes, départements, ...).
+
+Les listes changent au plus une fois par jour : elles sont partagées entre
+toutes les sessions Streamlit du process, servies depuis la mémoire et
+rafraîchies en tâche de fond une fois le TTL dépassé (stale-while-revalidate).
+Avec SHARED_CACHE_PATH, le JSON brut de chaque liste est aussi gardé dans le
+cache disque partagé : un process qui démarre le relit au lieu d'appeler le
+backend.
+"""
+import json
+import os
+import threading
+import time
+
+import api_client
+import tracing
+from derived import RefreshingCache
+from shared_cache import SHARED_CACHE
+
+VOCAB_TTL_SECONDS = float(os.getenv("VOCAB_TTL_SECONDS", 6 * 3600))
+VOCAB_RETRY_SECONDS = float(os.getenv("VOCAB_RETRY_SECONDS", 30))
+
+# nom -> (endpoint, extraction de la liste depuis le JSON)
+VOCABULARIES = {
+    "villes": ("/candidat/ville", lambda js: [v[0] for v in js["data"]]),
+    "departements": ("/candidat/departement", lambda js: [d[0] for d in js["data"]]),
+    "regions": ("/candidat/region", lambda js: [r[0] for r in js["data"]]),
+    "skills": ("/skills/", lambda js: [s["skill"] for s in js]),
+    "contrats": ("/candidat/contrat", lambda js: [c[0] for c in js["data"]]),
+}
+
+
+VOCAB_CACHE = RefreshingCache(VOCAB_TTL_SECONDS)
+
+# dernières lignes brutes reçues par vocabulaire (colonnes au-delà du nom comprises)
+_raw_rows = {}
+
+
+def _extract(name: str, js) -> list:
+    values = VOCABULARIES[name][1](js)
+    _raw_rows[name] = js["data"] if isinstance(js, dict) else js
+    return values
+
+
+def vocabulary_rows(name: str):
+    """Lignes brutes du dernier chargement de `name`, ou None."""
+    return _raw_rows.get(name)
+
+
+def _shared_get(name: str):
+    """Liste `name` encore valide dans le cache disque partagé, ou None.
+
+    Une entrée illisible (tronquée, d'un autre format) est supprimée et
+    traitée comme absente.
+    """
+    if SHARED_CACHE is None:
+        return None
+    entry = SHARED_CACHE.get("vocab", name)
+    if entry is None or not entry[1]:
+        return None
+    try:
+        return _extract(name, json.loads(entry[0]))
+    except (ValueError, LookupError, TypeError):
+        SHARED_CACHE.delete("vocab", name)
+        tracing.incr("shared_cache_errors_total")
+        return None
+
+
+def _shared_put(name: str, js):
+    if SHARED_CACHE is not None:
+        SHARED_CACHE.put("vocab", name, json.dumps(js).encode("utf-8"), VOCAB_TTL_SECONDS)
+
+
+def _loader(api_base_url: str, name: str):
+    endpoint, _ = VOCABULARIES[name]
+
+    def load():
+        js = api_client.get_json(f"{api_base_url}{endpoint}")
+        _shared_put(name, js)
+        return _extract(name, js)
+    return load
+
+
+# nom -> (horodatage, exception) du dernier chargement en échec
+_failures = {}
+_failures_lock = threading.Lock()
+
+
+def _recent_failure(name: str):
+    with _failures_lock:
+        entry = _failures.get(name)
+    if entry is not None and time.monotonic() - entry[0] < VOCAB_RETRY_SECONDS:
+        return entry[1]
+    return None
+
+
+def load_vocabularies(api_base_url: str, retry_failed: bool = False):
+    """Retourne ({nom: liste}, {nom: exception}) pour les cinq vocabulaires.
+
+    Les listes absentes du cache sont chargées en parallèle ; une liste dont
+    l'endpoint échoue est vide et son erreur est rapportée à part. Cet échec
+    est retenu `VOCAB_RETRY_SECONDS` : les reruns suivants ne rappellent pas
+    l'endpoint en panne (sauf `retry_failed`, pour le préchauffage).
+    """
+    vocab, missing, errors = {}, {}, {}
+    for name, (endpoint, _) in VOCABULARIES.items():
+        value = VOCAB_CACHE.lookup(name, _loader(api_base_url, name))
+        if value is None:
+            value = _shared_get(name)
+            if value is not None:
+                VOCAB_CACHE.set(name, value)
+                tracing.incr("cache_hits_total", cache="shared")
+        failure = None if value is not None or retry_failed else _recent_failure(name)
+        if failure is not None:
+            errors[name] = failure
+        elif value is None:
+            missing[name] = f"{api_base_url}{endpoint}"
+        else:
+            vocab[name] = value
+    tracing.incr("cache_hits_total", len(vocab), cache="vocab")
+    tracing.incr("cache_misses_total", len(missing) + len(errors), cache="vocab")
+
+    if missing:
+        with tracing.span("vocab_fetch"):
+            results, fetch_errors = api_client.fetch_all(missing)
+        for name, js in results.items():
+            try:
+                vocab[name] = _extract(name, js)
+                VOCAB_CACHE.set(name, vocab[name])
+                _shared_put(name, js)
+            except Exception as e:
+                fetch_errors[name] = e
+        now = time.monotonic()
+        with _failures_lock:
+            for name in results:
+                _failures.pop(name, None)
+            for name, e in fetch_errors.items():
+                _failures[name] = (now, e)
+        errors.update(fetch_errors)
+    for name in errors:
+        vocab[name] = []
+    return vocab, errors
+
+
+def invalidate_vocabularies(name=None):
+    """Force le rechargement d'un vocabulaire (ou de tous) au prochain accès."""
+    VOCAB_CACHE.invalidate(name)
+    with _failures_lock:
+        if name is None:
+            _failures.clear()
+        else:
+            _failures.pop(name, None)
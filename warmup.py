@@ -0,0 +1,197 @@
+"""Démarrage du serveur Streamlit avec préchauffage des caches et sonde de disponibilité.
+
+    python warmup.py main.py --server.port=8501 --server.address=0.0.0.0
+
+Streamlit exécute le script de chaque session dans le process du serveur :
+les modules importés et les caches remplis ici avant et pendant le démarrage
+sont ceux que verront les sessions. Le préchauffage, dans un thread, importe
+les modules de l'application, charge les vocabulaires (en réessayant tant que
+le backend se réveille), construit les index géographique, de compétences et
+des positions des villes, décode les images de `ML/` et `logos/` et demande
+la première page des recherches les plus courantes (`WARMUP_QUERIES`).
+
+Une fois ces étapes faites, le process se déclare prêt : fichier
+`WARMUP_READY_FILE` (pour un HEALTHCHECK Docker) et, si `READINESS_PORT` est
+défini, `GET /ready` en 200 au lieu de 503 (pour le répartiteur de charge).
+Une étape en échec autre que les vocabulaires, ou `WARMUP_TIMEOUT_SECONDS`
+dépassé, n'empêche pas d'être prêt : le corps de la réponse devient
+« degraded: » suivi des étapes manquantes. Sans vocabulaires, les pages ne
+peuvent pas s'afficher : le process reste à 503 (« unavailable: ») et le
+préchauffage recommence jusqu'à ce qu'ils se chargent.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+from core.config import API_BASE_URL, PAGE_SIZE  # en premier : charge le .env
+import tracing
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIRS = ("ML", "logos")
+
+# recherches préchauffées : chaînes de requête séparées par « | », vide = sans filtre ;
+# par défaut la recherche sans filtre et une par type de contrat
+WARMUP_QUERIES = os.getenv("WARMUP_QUERIES")
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", 300))
+WARMUP_RETRY_SECONDS = 5
+WARMUP_READY_FILE = os.getenv("WARMUP_READY_FILE", os.path.join(tempfile.gettempdir(), "app.ready"))
+READINESS_PORT = int(os.getenv("READINESS_PORT", 0))
+
+STEP_VOCABULARIES = "vocabulaires"
+
+ready = threading.Event()
+status = "warming up"       # corps de GET /ready
+
+
+def _log(message: str):
+    print(f"[warmup] {message}", file=sys.stderr, flush=True)
+
+
+def _queries(contrats) -> list:
+    if WARMUP_QUERIES is None:
+        return [[]] + [[("contrat", c)] for c in contrats]
+    return [parse_qsl(q.strip()) for q in WARMUP_QUERIES.split("|")]
+
+
+def _vocabularies(deadline: float):
+    """Vocabulaires complets, en réessayant jusqu'à `deadline` ; None s'ils manquent encore."""
+    from vocab_cache import load_vocabularies
+
+    while True:
+        vocab, errors = load_vocabularies(API_BASE_URL, retry_failed=True)
+        if not errors:
+            return vocab
+        if time.monotonic() + WARMUP_RETRY_SECONDS > deadline:
+            _log(f"vocabulaires incomplets : {'; '.join(f'{name} ({e})' for name, e in errors.items())}")
+            return None
+        time.sleep(WARMUP_RETRY_SECONDS)
+
+
+def _assets():
+    from assets import image_variant
+
+    count = 0
+    for name in ASSET_DIRS:
+        directory = os.path.join(BASE_DIR, name)
+        for filename in sorted(os.listdir(directory)) if os.path.isdir(directory) else ():
+            if filename.lower().endswith((".png", ".jpg", ".jpeg")):
+                image_variant(os.path.join(directory, filename))
+                count += 1
+    return count
+
+
+def _step(failures: list, name: str, action):
+    """Exécute une étape ; en cas d'échec, la note dans `failures` et journalise l'exception."""
+    try:
+        return action()
+    except Exception as e:
+        failures.append(name)
+        _log(f"{name} : {type(e).__name__}: {e}")
+        return None
+
+
+def warm_up(timeout: float = WARMUP_TIMEOUT_SECONDS) -> list:
+    """Remplit les caches du process ; retourne les étapes en échec (vide : tout chargé)."""
+    deadline = time.monotonic() + timeout
+    failures = []
+    with tracing.span("warmup"):
+        with tracing.span("warmup_imports"):
+            import core.search  # noqa: F401  (démarre aussi le keep-warm du backend)
+            import core.ui  # noqa: F401
+            import offer_render  # noqa: F401
+            from geo_index import get_geo_index
+            from nearby import get_ville_grid
+            from pagination import fetch_page
+            from skill_search import get_skill_index
+
+        with tracing.span("warmup_assets"):
+            count = _step(failures, "images", _assets)
+            if count is not None:
+                _log(f"{count} images préparées")
+
+        vocab = _vocabularies(deadline)
+        if vocab is None:
+            return failures + [STEP_VOCABULARIES]
+        geo = _step(failures, "index géographique", lambda: get_geo_index(API_BASE_URL))
+        counts = geo.counts.get("skill") if geo is not None else None
+        _step(failures, "index des compétences", lambda: get_skill_index(vocab["skills"], counts))
+        _step(failures, "grille des villes", lambda: get_ville_grid(vocab["villes"]))
+
+        for params in _queries(vocab["contrats"]):
+            if time.monotonic() > deadline:
+                return failures + ["délai dépassé"]
+            _step(failures, f"recherche {params}", lambda: fetch_page(API_BASE_URL, params, 0, PAGE_SIZE))
+    return failures
+
+
+def _mark_ready(failures):
+    global status
+    status = f"degraded: {', '.join(failures)}" if failures else "ready"
+    ready.set()
+    with open(WARMUP_READY_FILE, "w") as f:
+        f.write(str(os.getpid()))
+
+
+def _run():
+    global status
+    start = time.perf_counter()
+    while True:
+        try:
+            failures = warm_up()
+        except Exception:
+            failures = None
+            _log(f"échec :\n{traceback.format_exc()}")
+        if failures is not None and STEP_VOCABULARIES not in failures:
+            break
+        status = "unavailable: vocabulaires non chargés, nouvel essai"
+        _log("vocabulaires indisponibles : toujours hors service, nouvel essai")
+        time.sleep(WARMUP_RETRY_SECONDS)
+    _mark_ready(failures)
+    state = f"incomplet : {', '.join(failures)}" if failures else "caches chauds"
+    _log(f"prêt en {time.perf_counter() - start:.1f} s ({state})")
+
+
+class _ReadinessHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/ready":
+            self.send_error(404)
+            return
+        body = f"{status}\n".encode("utf-8")
+        self.send_response(200 if ready.is_set() else 503)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(readiness_port: int = READINESS_PORT):
+    """Lance le préchauffage et, si `readiness_port`, la sonde HTTP ; non bloquant."""
+    if os.path.exists(WARMUP_READY_FILE):
+        os.remove(WARMUP_READY_FILE)  # conteneur redémarré : l'ancien état ne vaut plus
+    if readiness_port:
+        server = ThreadingHTTPServer(("0.0.0.0", readiness_port), _ReadinessHandler)
+        threading.Thread(target=server.serve_forever, name="readiness", daemon=True).start()
+    threading.Thread(target=_run, name="warmup", daemon=True).start()
+
+
+def main(argv=None):
+    from streamlit.web import cli
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        argv = ["main.py"]
+    start()
+    sys.argv = ["streamlit", "run", *argv]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    main()